@@ -0,0 +1,262 @@
+"""
+PetFinder Collector Throughput Benchmark
+
+Times the collector's three heavy stages against the local mock API (mock_petfinder_server.py)
+so optimizations can be compared with a saved baseline instead of with live, quota-limited runs:
+
+    - state:   collect_state_data for one location (CA, sized with --state-animals)
+    - all:     collect_all_states over every location in US_STATES
+    - combine: combine_state_files over the files written by the `all` stage
+
+Each stage runs in a fresh process inside a temporary working directory, so peak RSS is the
+stage's own and no collection files, progress files or logs are left behind. Reported metrics:
+wall time, pages/sec and animals/sec (pages and animals served by the mock; rows combined for
+`combine`), peak RSS in MB and bytes written to the collection directory.
+
+Usage:
+    python benchmark_collector.py --format csv --save baseline.json
+    # ...change the collector...
+    python benchmark_collector.py --format csv --baseline baseline.json
+
+    python benchmark_collector.py --latency 0.05 --error-rate 0.02 --max-workers 8 --stages all
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from mock_petfinder_server import MockPetfinderConfig, MockPetfinderServer
+
+ANIMAL_TYPE: str = 'cat'
+STATUS: str = 'adoptable'
+STATE_LOCATION: str = 'CA'
+STAGES: List[str] = ['state', 'all', 'combine']
+STAGE_RUN_IDS: Dict[str, str] = {'state': 'bench-state', 'all': 'bench-all', 'combine': 'bench-all'}
+METRICS: List[str] = ['seconds', 'pages_per_sec', 'animals_per_sec', 'peak_rss_mb', 'bytes_written']
+
+
+def _directory_size(path: str) -> int:
+    """Total size in bytes of the files under a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _count_rows(path: str) -> int:
+    """Rows of a combined CSV or Parquet file."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    import pandas as pd
+    return sum(len(chunk) for chunk in pd.read_csv(path, usecols=['id'], chunksize=100_000))
+
+
+def run_stage(stage: str, base_url: str, workdir: str, output_format: str, max_workers: int,
+              rate: float, verbose: bool) -> Dict[str, Any]:
+    """
+    Run one benchmark stage. Meant to be called in a fresh process.
+
+    The stage works in `workdir`, so the collector's log file and all output land there.
+
+    Args:
+        stage (str): 'state', 'all' or 'combine'
+        base_url (str): API root of the mock server
+        workdir (str): Working directory of the benchmark repetition
+        output_format (str): 'csv' or 'parquet'
+        max_workers (int): Locations collected concurrently in the `all` stage
+        rate (float): Requests per second allowed by the rate limiter
+        verbose (bool): Keep the collector's console logging
+
+    Returns:
+        Dict[str, Any]: seconds, peak_rss_mb, rss_at_start_mb, bytes_written and, for
+            `combine`, rows
+    """
+    os.chdir(workdir)
+    import petfinder_collector as collector
+
+    collector.setup_logging(console=verbose)
+
+    limiter = collector.AdaptiveRateLimiter(rate=rate, max_rate=rate, daily_limit=10 ** 9, state_file=None)
+    client = collector.StateBasedPetfinderClient('bench-key', 'bench-secret', rate_limiter=limiter,
+                                                 output_format=output_format, run_id=STAGE_RUN_IDS[stage],
+                                                 token_cache_file=None, base_url=base_url)
+    output_dir = os.path.join(workdir, ANIMAL_TYPE)
+    size_before = _directory_size(output_dir)
+    rss_at_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    combined = None
+    if stage == 'state':
+        client.collect_state_data(ANIMAL_TYPE, STATUS, STATE_LOCATION)
+    elif stage == 'all':
+        client.collect_all_states(ANIMAL_TYPE, STATUS, resume=False, max_workers=max_workers)
+    else:
+        combined = client.combine_state_files(ANIMAL_TYPE, STATUS)
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    result = {
+        'seconds': seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit / 2 ** 20,
+        'rss_at_start_mb': rss_at_start * rss_unit / 2 ** 20,
+        'bytes_written': _directory_size(output_dir) - size_before,
+    }
+    if stage == 'combine':
+        result['rows'] = _count_rows(combined) if combined else 0
+    return result
+
+
+def _server_stats(server: Optional[MockPetfinderServer], base_url: str) -> Dict[str, Any]:
+    """Request statistics of the in-process server, or of an external mock through /stats."""
+    if server is not None:
+        return server.snapshot()
+    return requests.get(base_url.rsplit('/v2', 1)[0] + '/stats', timeout=10).json()
+
+
+def run_benchmark(base_url: str, stages: List[str], output_format: str, max_workers: int, rate: float,
+                  repeat: int, server: Optional[MockPetfinderServer] = None,
+                  verbose: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Run the stages `repeat` times, each repetition in a new temporary directory.
+
+    Args:
+        base_url (str): API root of the mock server
+        stages (List[str]): Stages to run, in STAGES order (`combine` needs `all`)
+        output_format (str): 'csv' or 'parquet'
+        max_workers (int): Locations collected concurrently in the `all` stage
+        rate (float): Requests per second allowed by the rate limiter
+        repeat (int): Repetitions, the median of each metric is reported
+        server (Optional[MockPetfinderServer]): In-process server, read directly for statistics
+        verbose (bool): Keep the collector's console logging
+
+    Returns:
+        Dict[str, Dict[str, float]]: Median metrics per stage
+    """
+    runs: Dict[str, List[Dict[str, float]]] = {stage: [] for stage in stages}
+    context = multiprocessing.get_context('spawn')
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='petfinder_bench_') as workdir:
+            for stage in stages:
+                before = _server_stats(server, base_url)
+                with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                         initializer=sys.path.insert, initargs=(0, script_dir)) as pool:
+                    result = pool.submit(run_stage, stage, base_url, workdir, output_format,
+                                         max_workers, rate, verbose).result()
+                after = _server_stats(server, base_url)
+
+                pages = after['pages_served'] - before['pages_served']
+                animals = result.pop('rows') if stage == 'combine' else after['animals_served'] - before['animals_served']
+                result.update({
+                    'requests': after['animal_requests'] - before['animal_requests'],
+                    'pages': pages,
+                    'animals': animals,
+                    'pages_per_sec': pages / result['seconds'],
+                    'animals_per_sec': animals / result['seconds'],
+                })
+                runs[stage].append(result)
+
+    return {stage: {metric: statistics.median(run[metric] for run in stage_runs) for metric in stage_runs[0]}
+            for stage, stage_runs in runs.items()}
+
+
+def format_report(results: Dict[str, Dict[str, float]],
+                  baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """
+    Format results as a table, with the ratio to the baseline after each metric when given.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): Output of run_benchmark
+        baseline (Optional[Dict[str, Dict[str, float]]]): Results of an earlier run
+
+    Returns:
+        str: Report text
+    """
+    header = f"{'stage':<8} {'requests':>8} {'pages':>7} {'animals':>9}" + ''.join(f" {metric:>24}" for metric in METRICS)
+    lines = [header, '-' * len(header)]
+    for stage, metrics in results.items():
+        line = f"{stage:<8} {metrics['requests']:>8.0f} {metrics['pages']:>7.0f} {metrics['animals']:>9.0f}"
+        for metric in METRICS:
+            value = f"{metrics[metric]:,.2f}" if metric != 'bytes_written' else f"{metrics[metric]:,.0f}"
+            reference = (baseline or {}).get(stage, {}).get(metric)
+            if reference:
+                value += f" ({metrics[metric] / reference:.2f}x)"
+            line += f" {value:>24}"
+        lines.append(line)
+    if baseline:
+        lines.append("(ratios are current / baseline: higher is better for */sec, lower for the rest)")
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    """Start the mock server, run the benchmark and print, save or compare the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the PetFinder collector against the local mock API.")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated stages (default: all three)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Collector output format")
+    parser.add_argument('--max-workers', type=int, default=4, help="Concurrent locations in the `all` stage")
+    parser.add_argument('--rate', type=float, default=1000.0, help="Rate limiter requests per second")
+    parser.add_argument('--repeat', type=int, default=1, help="Repetitions, medians are reported")
+    parser.add_argument('--animals-per-location', type=int, default=300, help="Mock animals per location")
+    parser.add_argument('--state-animals', type=int, default=5000, help=f"Mock animals in {STATE_LOCATION}")
+    parser.add_argument('--seed', type=int, default=0, help="Mock data seed")
+    parser.add_argument('--latency', type=float, default=0.0, help="Mock latency per /animals request in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of mock requests failing with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of mock requests failing with 429")
+    parser.add_argument('--base-url', help="Use an already running mock server instead of starting one")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare with results saved by an earlier --save")
+    parser.add_argument('--verbose', action='store_true', help="Show the collector's log output")
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if stage in args.stages.split(',')]
+    if 'combine' in stages and 'all' not in stages:
+        raise SystemExit("The combine stage combines the output of the all stage, run them together")
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        config = MockPetfinderConfig(seed=args.seed, animals_per_location=args.animals_per_location,
+                                     location_sizes={STATE_LOCATION: args.state_animals}, latency=args.latency,
+                                     error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                     retry_after=0.1)
+        server = MockPetfinderServer(config)
+        base_url = server.start()
+
+    try:
+        results = run_benchmark(base_url, stages, args.format, args.max_workers, args.rate, args.repeat,
+                                server=server, verbose=args.verbose)
+    finally:
+        if server is not None:
+            server.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+
+    print(f"Collector benchmark: format={args.format}, max_workers={args.max_workers}, repeat={args.repeat}, "
+          f"mock={base_url}")
+    print(format_report(results, baseline))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
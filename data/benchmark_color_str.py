@@ -0,0 +1,114 @@
+"""
+Colour String Build and Classification Benchmark
+
+Times the `color_str` / `cleaned_color` steps of preprocess_cats_data on a synthetic frame,
+comparing the row-wise code they replaced with the columnar versions in data_prep_utils.py:
+
+    - build:    apply(' | '.join, axis=1) over the three colour columns vs build_color_str
+    - classify: color_str.apply(color_classifier) vs classify_color_strs
+
+The frame mimics the collected data: PetFinder colour names, mostly missing secondary and
+tertiary colours, and a shuffled index. Both versions must produce identical output (values
+and index), which is checked before the timings are reported.
+
+Usage:
+    python benchmark_color_str.py --rows 1000000
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_prep_utils import build_color_str, cached_color_classifier, classify_color_strs, color_classifier
+
+COLOR_COLS = ['colors_primary', 'colors_secondary', 'colors_tertiary']
+# Share of missing values per colour column, roughly as in the collected data
+MISSING_RATES: Dict[str, float] = {'colors_primary': 0.3, 'colors_secondary': 0.7, 'colors_tertiary': 0.9}
+PETFINDER_COLORS = [
+    'Black', 'Black & White / Tuxedo', 'Blue Cream', 'Blue Point', 'Brown / Chocolate', 'Buff & White',
+    'Buff / Tan / Fawn', 'Calico', 'Chocolate Point', 'Cream / Ivory', 'Cream Point', 'Dilute Calico',
+    'Dilute Tortoiseshell', 'Flame Point', 'Gray & White', 'Gray / Blue / Silver', 'Lilac Point',
+    'Orange & White', 'Orange / Red', 'Seal Point', 'Smoke', 'Tabby (Brown / Chocolate)',
+    'Tabby (Buff / Tan / Fawn)', 'Tabby (Gray / Blue / Silver)', 'Tabby (Leopard / Spotted)',
+    'Tabby (Orange / Red)', 'Tabby (Tiger Striped)', 'Torbie', 'Tortoiseshell', 'White',
+]
+
+
+def make_color_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic frame with the three colour columns and a shuffled index.
+
+    Args:
+        rows (int): Number of rows
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Colour columns with missing values
+    """
+    rng = np.random.default_rng(seed)
+    colors = np.array(PETFINDER_COLORS, dtype=object)
+    data = {}
+    for col in COLOR_COLS:
+        values = rng.choice(colors, rows)
+        values[rng.random(rows) < MISSING_RATES[col]] = None
+        data[col] = values
+    return pd.DataFrame(data, index=rng.permutation(rows))
+
+
+def _timed(func: Callable[[], pd.Series]) -> Tuple[pd.Series, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """
+    Time the row-wise and columnar versions of both steps and check they agree.
+
+    Args:
+        df (pd.DataFrame): Output of make_color_frame
+
+    Returns:
+        Dict[str, Dict[str, float]]: Seconds of the row-wise and columnar versions per step
+
+    Raises:
+        AssertionError: If a columnar version gives different output from the row-wise one
+    """
+    row_wise_str, row_wise_build = _timed(
+        lambda: df[COLOR_COLS].fillna('').apply(lambda x: ' | '.join(filter(None, x)), axis=1))
+    columnar_str, columnar_build = _timed(lambda: build_color_str(df))
+    pd.testing.assert_series_equal(columnar_str, row_wise_str.astype(object))
+
+    cached_color_classifier.cache_clear()
+    row_wise_colors, row_wise_classify = _timed(lambda: columnar_str.apply(color_classifier))
+    columnar_colors, columnar_classify = _timed(lambda: classify_color_strs(columnar_str))
+    pd.testing.assert_series_equal(columnar_colors, row_wise_colors.astype(object))
+
+    return {
+        'build': {'row_wise': row_wise_build, 'columnar': columnar_build},
+        'classify': {'row_wise': row_wise_classify, 'columnar': columnar_classify},
+    }
+
+
+def main() -> None:
+    """Build the synthetic frame, run the benchmark and print the timings."""
+    parser = argparse.ArgumentParser(description="Benchmark the color_str build and classification steps.")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Rows in the synthetic frame")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    df = make_color_frame(args.rows, args.seed)
+    results = run_benchmark(df)
+
+    print(f"{args.rows:,} rows, {build_color_str(df).nunique()} unique colour combinations (outputs identical)")
+    print(f"{'step':<10} {'row-wise (s)':>14} {'columnar (s)':>14} {'speed-up':>10}")
+    for step, timings in results.items():
+        print(f"{step:<10} {timings['row_wise']:>14.3f} {timings['columnar']:>14.3f} "
+              f"{timings['row_wise'] / timings['columnar']:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
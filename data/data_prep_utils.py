@@ -2,7 +2,14 @@ import re
 from typing import List
 import pandas as pd
 import re
-from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from statistics import NormalDist
+import math
+import os
+import time
+import numpy as np
 
 
 def color_classifier(color_combination: str) -> str:
@@ -146,6 +153,73 @@ def color_classifier(color_combination: str) -> str:
     ## ====================================================
     return colors[0] if colors else 'Unknown'
 
+
+@lru_cache(maxsize=None)
+def cached_color_classifier(color_combination: str) -> str:
+    """
+    Memoized `color_classifier`. Hit/miss statistics are available through
+    `cached_color_classifier.cache_info()` and can be reset with `.cache_clear()`.
+    """
+    return color_classifier(color_combination)
+
+
+def classify_color_strs(color_strs: pd.Series) -> pd.Series:
+    """
+    Apply `color_classifier` to a column of colour strings, classifying each distinct
+    combination only once.
+
+    The column is factorized into integer codes, the (few hundred) unique combinations
+    are classified through `cached_color_classifier`, and the results are broadcast back
+    to every row by code. Missing values stay missing.
+
+    Args:
+        color_strs (pd.Series): Colour strings as built for the `color_str` column
+
+    Returns:
+        pd.Series: Standardized colour per row, aligned to `color_strs`
+    """
+    codes, uniques = pd.factorize(color_strs)
+    lookup = np.array([cached_color_classifier(color_str) for color_str in uniques] + [np.nan], dtype=object)
+    # Missing values are coded -1, which picks the trailing NaN from the lookup table
+    return pd.Series(lookup[codes], index=color_strs.index, dtype=object)
+
+
+def build_color_str(df: pd.DataFrame, color_cols: List[str] = None, sep: str = ' | ') -> pd.Series:
+    """
+    Build the concatenated colour string (e.g. "Black | White") for every row without a
+    row-wise apply.
+
+    Each colour column is factorized and the per-column codes are combined into a single
+    integer key per row, so the string join only runs once per distinct combination and
+    is broadcast back to the rows by key. Missing and empty colours are skipped, matching
+    `' | '.join(filter(None, ...))` on the NaN-filled columns.
+
+    Args:
+        df (pd.DataFrame): Frame containing the colour columns
+        color_cols (List[str]): Columns to join, in order. Defaults to primary, secondary
+            and tertiary colours.
+        sep (str): Separator placed between non-empty colours
+
+    Returns:
+        pd.Series: Concatenated colour string per row ('' if all colours are missing)
+    """
+    if color_cols is None:
+        color_cols = ['colors_primary', 'colors_secondary', 'colors_tertiary']
+
+    # Mixed-radix key over the per-column category codes
+    key = np.zeros(len(df), dtype=np.int64)
+    for col in color_cols:
+        codes, uniques = pd.factorize(df[col].fillna(''))
+        key = key * len(uniques) + codes
+
+    combo_codes, _ = pd.factorize(key)
+    _, first_rows = np.unique(combo_codes, return_index=True)
+
+    combos = df[color_cols].iloc[first_rows].fillna('').to_numpy(dtype=object)
+    lookup = np.array([sep.join(filter(None, combo)) for combo in combos], dtype=object)
+    return pd.Series(lookup[combo_codes], index=df.index, dtype=object)
+
+
 # test colour classifier
 def test_color_mapping(df):
     """Test the mapping function with sample data"""
@@ -198,17 +272,75 @@ def print_color_comparison(df, original_col_to_compare='colors_primary'):
         print(f"{color:<30} {original_count:<15} {original_pct:<12.1f} {cleaned_count:<15} {cleaned_pct:<12.1f} {final_count:<25} {final_pct:<12.1f}")
 
 
+def _keyword_trie_regex(keywords):
+    """
+    Build a regex alternation shaped like a trie over `keywords`.
+
+    Shared prefixes are factored out so the regex engine walks one path per position
+    instead of trying every keyword, and greedy optional groups make it return the
+    longest keyword that starts at the match position.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of keyword marker
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + pattern + ')?' if '' in node else pattern
+
+    return build(trie)
+
+
+# Per-process imputer used by the `extract_colors_batch` worker pool
+_worker_imputer = None
+
+
+def _init_imputer_worker(imputer):
+    global _worker_imputer
+    _worker_imputer = imputer
+
+
+def _match_imputer_shard(texts):
+    return _worker_imputer._match_texts(texts)
+
+
+def _wilson_interval(successes, total, confidence_level=0.95):
+    """Wilson score interval for a binomial proportion, (nan, nan) if `total` is 0"""
+    if total == 0:
+        return (float('nan'), float('nan'))
+
+    z = NormalDist().inv_cdf(0.5 + confidence_level / 2)
+    p = successes / total
+    denominator = 1 + z ** 2 / total
+    centre = (p + z ** 2 / (2 * total)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / total + z ** 2 / (4 * total ** 2)) / denominator
+    return (centre - half_width, centre + half_width)
+
+
 class CatColorImputer:
-    def __init__(self):
+    def __init__(self, n_jobs=1):
         """
         A class for imputing cat colors based on hierarchical matching rules.
 
+        Args:
+            n_jobs (int): Number of worker processes used by `extract_colors_batch`.
+                1 runs serially, -1 uses every CPU.
+
         Attributes:
             multicolor_keywords (Dict[str, Dict]): Rules for identifying multicolor patterns.
             tabby_keywords (Dict[str, Dict]): Rules for identifying tabby patterns.
             point_keywords (Dict[str, List[str]]): Keywords for identifying point patterns.
             solid_keywords (Dict[str, List[str]]): Keywords for identifying solid colors.
+            n_jobs (int): Number of worker processes used for batch extraction.
         """
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(1, n_jobs)
+
         # Level 1: Multi-color/pattern keywords (highest priority)
         self.multicolor_keywords = {
             'Black & White / Tuxedo': {
@@ -472,71 +604,69 @@ class CatColorImputer:
                 'silver smoke', 'black smoke', 'blue smoke', 'smoked'
             ]
         }
-    
-    def _check_multicolor_match(self, text, color_rules):
-        """Check if text matches multicolor pattern rules"""
-        text_lower = text.lower()
-        
-        # Check exclusions first
-        if 'exclude_if_present' in color_rules:
-            for exclude_word in color_rules['exclude_if_present']:
-                if exclude_word in text_lower:
-                    return False
-        
-        # Check required_all patterns (must match at least one set)
-        required_all_match = False
-        if color_rules['required_all']:
-            for required_set in color_rules['required_all']:
-                if isinstance(required_set, list):
-                    # All words in this set must be present
-                    if all(word in text_lower for word in required_set):
-                        required_all_match = True
-                        break
-                else:
-                    # Single phrase
-                    if required_set in text_lower:
-                        required_all_match = True
-                        break
-        
-        # Check required_any patterns
-        required_any_match = False
-        if color_rules['required_any']:
-            for phrase in color_rules['required_any']:
-                if phrase in text_lower:
-                    required_any_match = True
-                    break
-        
-        # Must match either required_all or required_any (or both if both exist)
-        if color_rules['required_all'] and not color_rules['required_any']:
-            return required_all_match
-        elif color_rules['required_any'] and not color_rules['required_all']:
-            return required_any_match
-        elif color_rules['required_all'] and color_rules['required_any']:
-            return required_all_match or required_any_match
-        
-        return False
-    
-    def _check_tabby_match(self, text, tabby_rules):
-        """Check if text matches tabby pattern"""
-        text_lower = text.lower()
-        
-        # First check specific phrases
-        for phrase in tabby_rules['specific_phrases']:
-            if phrase in text_lower:
-                return True
-        
-        # Then check base_color + pattern_word combinations
-        if tabby_rules['base_colors'] and tabby_rules['pattern_words']:
-            base_color_found = any(color in text_lower for color in tabby_rules['base_colors'])
-            pattern_found = any(pattern in text_lower for pattern in tabby_rules['pattern_words'])
-            return base_color_found and pattern_found
-        
-        # Special case for tiger striped and spotted (no base color requirement)
-        if not tabby_rules['base_colors']:
-            return any(phrase in text_lower for phrase in tabby_rules['specific_phrases'])
-        
-        return False
-    
+
+        self._compile_matchers()
+
+    def _compile_matchers(self):
+        """
+        Compile the keyword tables into single-pass matchers.
+
+        Levels 1-3 use plain substring matching, so all of their keywords are merged into one
+        trie-shaped regex that reports the longest keyword starting at every position of the
+        text. Any shorter keyword starting at the same position is a prefix of that match, so
+        precomputed prefix sets recover every keyword present from a single scan. Level 4 is
+        compiled the same way but anchored on word boundaries.
+
+        Must be called again if the keyword tables are modified after initialisation.
+        """
+        substring_keywords = set()
+
+        self._multicolor_rules = []
+        for color, rules in self.multicolor_keywords.items():
+            required_all = [frozenset(required_set if isinstance(required_set, list) else [required_set])
+                            for required_set in rules['required_all']]
+            required_any = frozenset(rules['required_any'])
+            exclude = frozenset(rules.get('exclude_if_present', []))
+            self._multicolor_rules.append((color, required_all, required_any, exclude))
+            substring_keywords.update(required_any, exclude, *required_all)
+
+        self._tabby_rules = []
+        for color, rules in self.tabby_keywords.items():
+            specific = frozenset(rules['specific_phrases'])
+            # base_color + pattern_word combinations only apply when both lists are given
+            base = frozenset(rules['base_colors']) if rules['pattern_words'] else frozenset()
+            pattern = frozenset(rules['pattern_words']) if rules['base_colors'] else frozenset()
+            self._tabby_rules.append((color, specific, base, pattern))
+            substring_keywords.update(specific, base, pattern)
+
+        self._point_rules = [(color, frozenset(keywords)) for color, keywords in self.point_keywords.items()]
+        for _, keywords in self._point_rules:
+            substring_keywords.update(keywords)
+
+        self._solid_rules = [(color, frozenset(keywords)) for color, keywords in self.solid_keywords.items()]
+        solid_keywords = set().union(*(keywords for _, keywords in self._solid_rules))
+
+        self._substring_matcher = re.compile('(?=(' + _keyword_trie_regex(substring_keywords) + '))')
+        self._substring_prefixes = {
+            keyword: frozenset(k for k in substring_keywords if keyword.startswith(k))
+            for keyword in substring_keywords
+        }
+
+        # Use word boundaries to avoid false matches
+        self._solid_matcher = re.compile(r'\b(?=(' + _keyword_trie_regex(solid_keywords) + r')\b)')
+        self._solid_prefixes = {
+            keyword: frozenset(k for k in solid_keywords
+                               if keyword.startswith(k) and (k == keyword or re.match(r'\W', keyword[len(k)])))
+            for keyword in solid_keywords
+        }
+
+    def _find_keywords(self, text, matcher, prefixes):
+        """Return the set of keywords present in `text` from a single matcher scan"""
+        present = set()
+        for keyword in set(matcher.findall(text)):
+            present |= prefixes[keyword]
+        return present
+
     def extract_color_from_text(self, text, field_name="description"):
         """
         Extract color using hierarchical matching
@@ -544,31 +674,35 @@ class CatColorImputer:
         if pd.isna(text) or text == "":
             return None
         
-        text = str(text).lower()
+        return self._match_color(str(text).lower())
+
+    def _match_color(self, text):
+        """Apply the rule hierarchy to already lowercased text"""
+        # Single scan for every level 1-3 keyword
+        present = self._find_keywords(text, self._substring_matcher, self._substring_prefixes)
         
         # Level 1: Check multicolor patterns first (highest priority)
-        for color, rules in self.multicolor_keywords.items():
-            if self._check_multicolor_match(text, rules):
+        for color, required_all, required_any, exclude in self._multicolor_rules:
+            if exclude & present:
+                continue
+            if required_any & present or any(required_set <= present for required_set in required_all):
                 return color
         
         # Level 2: Check tabby patterns
-        for color, rules in self.tabby_keywords.items():
-            if self._check_tabby_match(text, rules):
+        for color, specific, base, pattern in self._tabby_rules:
+            if specific & present or (base & present and pattern & present):
                 return color
         
         # Level 3: Check point patterns
-        for color, keywords in self.point_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    return color
+        for color, keywords in self._point_rules:
+            if keywords & present:
+                return color
         
         # Level 4: Check solid colors (lowest priority)
-        for color, keywords in self.solid_keywords.items():
-            for keyword in keywords:
-                # Use word boundaries to avoid false matches
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, text):
-                    return color
+        present = self._find_keywords(text, self._solid_matcher, self._solid_prefixes)
+        for color, keywords in self._solid_rules:
+            if keywords & present:
+                return color
         
         return None
     
@@ -579,13 +713,93 @@ class CatColorImputer:
     def extract_color_from_description(self, description):
         """Extract color specifically from descriptions"""
         return self.extract_color_from_text(description, "description")
-    
-    def impute_colors(self, df, description_col='description', name_col='name', 
-                     color_col='colors_primary'):
+
+    def _process_pool(self):
+        """Worker pool for `extract_colors_batch`, with the imputer pickled once per worker"""
+        return ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_imputer_worker,
+                                   initargs=(self,))
+
+    def extract_colors_batch(self, texts, executor=None):
+        """
+        Extract colors for a whole column of text at once.
+
+        Applies the same hierarchy as `extract_color_from_text`: missing and empty values
+        are skipped, the rest are lowercased and scanned once each by the compiled matchers.
+        With `n_jobs > 1` the texts are split into contiguous shards that are matched in a
+        process pool and stitched back in their original order.
+
+        Args:
+            texts (pd.Series): Free text (e.g. descriptions) to extract colors from
+            executor (ProcessPoolExecutor, optional): Pool from `_process_pool` to reuse
+                across calls. By default a pool is started and shut down per call.
+
+        Returns:
+            pd.Series: Extracted color per row (None where no rule matched), aligned to `texts`
+        """
+        # Work positionally so duplicate index labels cannot collide
+        values = pd.Series(texts.to_numpy(dtype=object))
+        colors = np.full(len(values), None, dtype=object)
+
+        valid = (values.notna() & (values != "")).to_numpy()
+        text = values[valid].astype(str).tolist()
+
+        if self.n_jobs > 1 and len(text) >= self.n_jobs:
+            # Several shards per worker to even out long and short descriptions
+            n_shards = self.n_jobs * 4
+            bounds = np.linspace(0, len(text), n_shards + 1).astype(int)
+            shards = [text[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+            if executor is None:
+                with self._process_pool() as pool:
+                    matched = [color for shard in pool.map(_match_imputer_shard, shards) for color in shard]
+            else:
+                matched = [color for shard in executor.map(_match_imputer_shard, shards) for color in shard]
+        else:
+            matched = self._match_texts(text)
+
+        colors[valid] = matched
+        return pd.Series(colors, index=texts.index, dtype=object)
+
+    def impute_missing(self, df, missing=None, color_col='cleaned_color', description_col='description'):
+        """
+        Fill missing colours from descriptions, running extraction only on the rows that need it.
+
+        Args:
+            df (pd.DataFrame): Frame containing the colour and description columns
+            missing (pd.Series, optional): Boolean mask of rows to impute. Defaults to the
+                null mask of `color_col`.
+            color_col (str): Column holding the known colours
+            description_col (str): Column to extract colours from
+
+        Returns:
+            pd.Series: `color_col` with the masked rows replaced by the extracted colour
+                (None where no rule matched), aligned to `df`
+        """
+        if missing is None:
+            missing = df[color_col].isna()
+
+        colors = df[color_col].to_numpy(dtype=object, copy=True)
+        positions = np.flatnonzero(np.asarray(missing, dtype=bool))
+        colors[positions] = self.extract_colors_batch(df[description_col].iloc[positions]).to_numpy()
+
+        return pd.Series(colors, index=df.index, dtype=object)
+
+    def _match_texts(self, texts):
+        """Match a list of raw strings, preserving order"""
+        return [self._match_color(text.lower()) for text in texts]
+
+    def impute_colors(self, df, description_col='description', name_col='name',
+                     color_col='colors_primary', batch=True):
         """
         Validates the imputation approach on a sample of data.
+
+        With `batch=True` (default) the description rules are evaluated column-wise via
+        `extract_colors_batch`; `batch=False` walks the frame row by row. Both return the
+        same (results, confidence_scores, methods_used) lists.
         """
-    
+        if batch:
+            return self._impute_colors_batch(df, description_col, color_col)
+
         results = []
         confidence_scores = []
         methods_used = []
@@ -620,81 +834,206 @@ class CatColorImputer:
             methods_used.append('none')
         
         return results, confidence_scores, methods_used
-    
+
+    def _impute_colors_batch(self, df, description_col, color_col):
+        """Column-wise implementation of `impute_colors`"""
+        original = df[color_col].to_numpy(dtype=object)
+        known = pd.notna(original)
+
+        results = original.copy()
+        results[~known] = None
+        confidence_scores = np.where(known, 1.0, 0.0)
+        methods_used = np.where(known, 'original', 'none').astype(object)
+
+        # Try description for rows without a known color
+        color_from_desc = self.extract_colors_batch(df[description_col][~known]).to_numpy()
+        found = pd.notna(color_from_desc)
+        missing_positions = np.flatnonzero(~known)[found]
+        results[missing_positions] = color_from_desc[found]
+        confidence_scores[missing_positions] = 0.9
+        methods_used[missing_positions] = 'description'
+
+        return results.tolist(), confidence_scores.tolist(), methods_used.tolist()
+
     def validate_imputation(self, df, test_fraction=0.1, color_col='cleaned_color',
-                           description_col='description', name_col='name'):
+                           description_col='description', name_col='name', max_samples=100000,
+                           stratify=False, time_budget=None, batch_size=5000, confidence_level=0.95,
+                           random_state=42, return_confusion_matrix=False):
         """
         Validate the imputation approach on known data
+
+        A sample of rows with a known colour is re-imputed from descriptions alone and
+        compared against the known colour. The frame is never copied: the sample is drawn
+        as row positions and only the needed columns are read.
+
+        Args:
+            df (pd.DataFrame): Frame with known colours in `color_col`
+            test_fraction (float): Fraction of known rows to test
+            max_samples (int): Upper bound on the number of rows tested
+            stratify (bool): Sample the same fraction from every colour (at least one row
+                each, as far as the sample size allows) instead of sampling uniformly, so
+                rare colours are covered. The sample never exceeds `max_samples`.
+            time_budget (Optional[float]): Seconds to spend on imputation. The sample is
+                processed in `batch_size` chunks and validation stops after the chunk that
+                exhausts the budget; accuracy is reported on the rows tested so far. With
+                `n_jobs > 1` the chunks share one worker pool.
+            batch_size (int): Rows per chunk when `time_budget` is set
+            confidence_level (float): Coverage of the Wilson score intervals on accuracy
+            random_state (int): Seed for sampling
+            return_confusion_matrix (bool): Also return the actual vs predicted confusion
+                matrix (see `confusion_matrix`)
+
+        Returns:
+            Tuple[Optional[Dict], Optional[pd.DataFrame]]: Accuracy summary and per-row
+                results, or (None, None) if there are no known colours. A third element
+                holding the confusion matrix is added when `return_confusion_matrix` is set.
         """
-        # Get sample with known colors
-        known_colors = df[(df[color_col].notna()) & (df[color_col] != '')].copy()
+        # Get positions of rows with known colors
+        known_positions = np.flatnonzero(((df[color_col].notna()) & (df[color_col] != '')).to_numpy())
         
-        if len(known_colors) == 0:
-            return None
+        if len(known_positions) == 0:
+            return (None, None, None) if return_confusion_matrix else (None, None)
         
         # Sample for testing
-        test_size = min(int(len(known_colors) * test_fraction), 100000)
-        test_sample = known_colors.sample(n=test_size, random_state=42)
-        
-        # Temporarily hide the colors
-        test_sample_hidden = test_sample.copy()
-        test_sample_hidden[color_col] = None
-        
-        # Try to predict them
-        predicted_colors, confidence, methods = self.impute_colors(
-            test_sample_hidden, description_col, name_col, color_col
-        )
-        
-        # Calculate accuracy
-        correct_predictions = 0
-        total_predictions = 0
-        
-        accuracy_by_method = defaultdict(lambda: {'correct': 0, 'total': 0})
-        accuracy_by_color = defaultdict(lambda: {'correct': 0, 'total': 0})
-        
-        for i, (actual, predicted, method) in enumerate(zip(
-            test_sample[color_col].values, predicted_colors, methods
-        )):
-            if predicted is not None:
-                total_predictions += 1
-                accuracy_by_method[method]['total'] += 1
-                accuracy_by_color[actual]['total'] += 1
-                
-                if actual == predicted:
-                    correct_predictions += 1
-                    accuracy_by_method[method]['correct'] += 1
-                    accuracy_by_color[actual]['correct'] += 1
+        test_size = min(int(len(known_positions) * test_fraction), max_samples)
+        if stratify:
+            test_positions = self._stratified_positions(
+                df[color_col].to_numpy()[known_positions], known_positions, test_size, random_state
+            )
+        else:
+            test_positions = pd.Series(known_positions).sample(n=test_size, random_state=random_state).to_numpy()
+
+        # Try to predict them from descriptions only (as if the colors were hidden)
+        descriptions = df[description_col].iloc[test_positions]
+        if time_budget is None:
+            predicted_colors = self.extract_colors_batch(descriptions).tolist()
+        else:
+            predicted_colors = []
+            start_time = time.monotonic()
+            # One pool for all chunks: starting workers per chunk would eat the budget
+            with (self._process_pool() if self.n_jobs > 1 else nullcontext()) as executor:
+                for start in range(0, len(descriptions), batch_size):
+                    predicted_colors.extend(self.extract_colors_batch(descriptions.iloc[start:start + batch_size],
+                                                                      executor=executor))
+                    if time.monotonic() - start_time > time_budget:
+                        break
+            test_positions = test_positions[:len(predicted_colors)]
+        predicted_colors = np.array(predicted_colors, dtype=object)
+        predicted_mask = pd.notna(predicted_colors)
+        methods = np.where(predicted_mask, 'description', 'none').astype(object)
+        actual_colors = df[color_col].to_numpy(dtype=object)[test_positions]
         
+        # Calculate accuracy over the rows that received a prediction
+        correct = predicted_mask & (actual_colors == predicted_colors)
+        correct_predictions = int(correct.sum())
+        total_predictions = int(predicted_mask.sum())
         overall_accuracy = correct_predictions / total_predictions if total_predictions > 0 else 0
+
+        scored = pd.DataFrame({
+            'actual': actual_colors[predicted_mask],
+            'method': methods[predicted_mask],
+            'correct': correct[predicted_mask],
+        })
         
-        # Calculate accuracy by method
-        method_accuracies = {}
-        for method, stats in accuracy_by_method.items():
-            if stats['total'] > 0:
-                method_accuracies[method] = stats['correct'] / stats['total']
-        
-        # Calculate accuracy by color
-        color_accuracies = {}
-        for color, stats in accuracy_by_color.items():
-            if stats['total'] > 0:
-                color_accuracies[color] = stats['correct'] / stats['total']
-        
+        # Calculate accuracy by method and by color
+        method_accuracies, method_accuracy_cis = self._grouped_accuracy(scored, 'method', confidence_level)
+        color_accuracies, color_accuracy_cis = self._grouped_accuracy(scored, 'actual', confidence_level)
 
         results_df = pd.DataFrame({
-                        'actual': test_sample[color_col].values,
+                        'actual': actual_colors,
                         'predicted': predicted_colors,
                         'method_used': methods,
-                        'desc': test_sample[description_col].values,
-                        'name':test_sample[name_col].values,
+                        'desc': df[description_col].to_numpy()[test_positions],
+                        'name': df[name_col].to_numpy()[test_positions],
                     })
-    
-        return {
+
+        summary = {
             'overall_accuracy': overall_accuracy,
-            'total_tested': len(test_sample),
+            'overall_accuracy_ci': _wilson_interval(correct_predictions, total_predictions, confidence_level),
+            'confidence_level': confidence_level,
+            'total_tested': len(test_positions),
+            'total_sampled': test_size,
             'total_predicted': total_predictions,
             'method_accuracies': method_accuracies,
-            'color_accuracies': color_accuracies
-        }, results_df
+            'method_accuracy_cis': method_accuracy_cis,
+            'color_accuracies': color_accuracies,
+            'color_accuracy_cis': color_accuracy_cis
+        }
+
+        if return_confusion_matrix:
+            return summary, results_df, self.confusion_matrix(results_df)
+        return summary, results_df
+
+    @staticmethod
+    def _grouped_accuracy(scored, group_col, confidence_level):
+        """Accuracy and Wilson interval per group of scored predictions"""
+        stats = scored.groupby(group_col, sort=False)['correct'].agg(['sum', 'count'])
+        accuracies = {group: float(row['sum'] / row['count']) for group, row in stats.iterrows()}
+        intervals = {group: _wilson_interval(int(row['sum']), int(row['count']), confidence_level)
+                     for group, row in stats.iterrows()}
+        return accuracies, intervals
+
+    @staticmethod
+    def confusion_matrix(results_df, no_match_label='No match'):
+        """
+        Confusion matrix of actual vs predicted colours from `validate_imputation` results.
+
+        Args:
+            results_df (pd.DataFrame): Per-row results returned by `validate_imputation`
+            no_match_label (str): Column label used for rows with no predicted colour
+
+        Returns:
+            pd.DataFrame: Counts with actual colours as rows and predicted colours as columns
+        """
+        predicted = results_df['predicted'].astype(object).where(results_df['predicted'].notna(), no_match_label)
+        return pd.crosstab(results_df['actual'].rename('actual'), predicted.rename('predicted'))
+
+    @staticmethod
+    def _stratified_positions(colors, positions, test_size, random_state):
+        """
+        Sample exactly `test_size` positions with the same fraction from every colour.
+
+        Rows are allocated by largest remainder, with at least one row per colour. When
+        those minimums push the total over `test_size`, rows are taken back from colours
+        with more than one (smallest remainder first), and if there are more colours than
+        `test_size` only the most common colours are kept.
+        """
+        rng = np.random.default_rng(random_state)
+        groups = list(pd.Series(positions).groupby(colors, sort=True).indices.values())
+        sizes = np.array([len(group) for group in groups])
+        quotas = sizes * (test_size / len(positions))
+
+        counts = np.minimum(sizes, np.maximum(1, np.floor(quotas).astype(int)))
+        remainders = quotas - np.floor(quotas)
+        by_remainder = np.argsort(-remainders, kind='stable')
+        excess = int(counts.sum()) - test_size
+
+        # Hand out the rows left by rounding down, largest remainder first
+        for i in by_remainder:
+            if excess >= 0:
+                break
+            if counts[i] < sizes[i]:
+                counts[i] += 1
+                excess += 1
+
+        # Take back rows added by the one-per-colour minimum, smallest remainder first
+        while excess > 0 and (counts > 1).any():
+            for i in by_remainder[::-1]:
+                if excess > 0 and counts[i] > 1:
+                    counts[i] -= 1
+                    excess -= 1
+
+        # More colours than rows to sample: drop the rarest colours
+        for i in np.argsort(sizes, kind='stable'):
+            if excess <= 0:
+                break
+            excess -= counts[i]
+            counts[i] = 0
+
+        sampled = [positions[rng.choice(group, size=n, replace=False)] for group, n in zip(groups, counts) if n]
+
+        # Shuffle so any prefix (e.g. a time-budgeted run) is still spread across colours
+        return rng.permutation(np.concatenate(sampled)) if sampled else np.array([], dtype=positions.dtype)
 
 
 def impute_coat_from_breed(breed):
@@ -823,4 +1162,66 @@ def create_metadata_table(df):
     print(f"Memory usage: {df.memory_usage(deep=True).sum()} bytes")
     print("\nDetailed Metadata:")
         
-    return metadata_df
\ No newline at end of file
+    return metadata_df
+
+
+## HELPER FUNCTIONS TO READ AND WRITE DATASETS AS CSV OR PARQUET
+
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+
+def _require_pyarrow():
+    """Raise a helpful ImportError if pyarrow, needed for Parquet files, is missing."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet files require pyarrow: pip install pyarrow") from e
+
+
+def read_table(path, columns=None):
+    """
+    Read a dataset saved as CSV or Parquet, chosen by the file extension.
+
+    Parquet keeps dtypes (timestamps, booleans, ints) and loads only the requested
+    columns, so it is much faster than re-parsing a large CSV.
+
+    Args:
+        path (str): Path to a .csv file, or a .parquet file or directory
+        columns (list, optional): Subset of columns to load
+
+    Returns:
+        pd.DataFrame: The loaded data
+    """
+    if str(path).endswith('.parquet'):
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def write_table(df, path, compression='zstd', row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """
+    Save a dataset as CSV or as typed, compressed Parquet, chosen by the file extension.
+
+    Parquet needs a single type per column, so object columns mixing types (e.g. booleans
+    with the 'Unknown' placeholder) are stored as strings, with nulls kept as nulls.
+
+    Args:
+        df (pd.DataFrame): Data to save
+        path (str): Output path ending in .csv or .parquet
+        compression (str): Parquet compression codec
+        row_group_size (int): Rows per Parquet row group
+    """
+    if not str(path).endswith('.parquet'):
+        df.to_csv(path, index=False)
+        return
+
+    _require_pyarrow()
+    mixed_cols = [
+        col for col in df.columns[df.dtypes == object]
+        if pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed')
+    ]
+    if mixed_cols:
+        df = df.copy()
+        for col in mixed_cols:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df.to_parquet(path, engine='pyarrow', index=False, compression=compression, row_group_size=row_group_size)
@@ -0,0 +1,395 @@
+"""
+Mock PetFinder API Server
+
+A local stand-in for the two PetFinder API v2 endpoints used by petfinder_collector.py,
+`POST /v2/oauth2/token` and `GET /v2/animals`, so the collector can be exercised and timed
+without live credentials or quota.
+
+Every location serves a deterministic, synthetic list of animals: the same seed always
+yields the same ids, fields and `published_at` dates, so runs are comparable. The list is
+paginated like the real API (`limit` up to 100, `page`, `pagination.total_pages`), sorted by
+`sort=recent` / `-recent`, and filtered by `after` / `before`. ZIP code locations with the
+same 3-digit prefix share part of their animals, like the overlapping Nevada ZIP radii.
+
+Failure injection:
+    - latency: fixed delay (plus random jitter) before every /animals response
+    - error rate: share of /animals requests answered with HTTP 500
+    - rate limit rate: share of /animals requests answered with HTTP 429 and Retry-After
+    - daily limit: HTTP 429 once this many /animals requests have been served
+    - token TTL: access tokens expire and are then rejected with HTTP 401
+
+Request counts are available from `GET /stats` (or MockPetfinderServer.stats in-process).
+
+Usage:
+    python mock_petfinder_server.py --port 8080 --latency 0.05 --error-rate 0.01
+
+    then set PETFINDER_API_URL = 'http://127.0.0.1:8080/v2' in petfinder_collector.py
+    (any API key and secret are accepted), or pass base_url to StateBasedPetfinderClient.
+
+Petfinder API Documentation: https://www.petfinder.com/developers/v2/docs/
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_ANIMALS_PER_LOCATION: int = 500
+DEFAULT_HISTORY_DAYS: int = 5 * 365  # `published_at` dates are spread over this many days
+REFERENCE_TIME: str = '2025-08-01T00:00:00+00:00'  # newest possible `published_at`, fixed for determinism
+MAX_PAGE_SIZE: int = 100
+ZIP_OVERLAP: float = 0.5  # share of a ZIP location's animals shared with ZIPs of the same 3-digit prefix
+
+_AGES = ['Baby', 'Young', 'Adult', 'Senior']
+_SIZES = ['Small', 'Medium', 'Large', 'Extra Large']
+_COATS = ['Short', 'Medium', 'Long', None]
+_BREEDS = ['Domestic Short Hair', 'Domestic Medium Hair', 'Domestic Long Hair', 'Siamese', 'Tabby', 'Bombay']
+_COLORS = ['Black', 'White', 'Gray & White', 'Orange / Red', 'Tuxedo', 'Calico', None]
+_TAGS = ['Friendly', 'Playful', 'Shy', 'Affectionate', 'Independent', 'Curious']
+_FLAGS = [True, False, None]
+
+
+class MockPetfinderConfig:
+    """
+    Settings of a mock server.
+
+    Args:
+        seed (int): Seed of the synthetic data and of the failure injection
+        animals_per_location (int): Animals served for every location not in `location_sizes`
+        location_sizes (Optional[Dict[str, int]]): Animals served per location, overriding the default
+        history_days (int): Days before REFERENCE_TIME over which `published_at` is spread
+        latency (float): Seconds added before every /animals response
+        latency_jitter (float): Extra random seconds, uniform between 0 and this value
+        error_rate (float): Share of /animals requests answered with HTTP 500
+        rate_limit_rate (float): Share of /animals requests answered with HTTP 429
+        retry_after (float): Retry-After seconds sent with injected 429 responses
+        daily_limit (Optional[int]): /animals requests served before every request gets HTTP 429
+        token_ttl (int): Seconds an access token stays valid
+    """
+
+    def __init__(self, seed: int = 0, animals_per_location: int = DEFAULT_ANIMALS_PER_LOCATION,
+                 location_sizes: Optional[Dict[str, int]] = None, history_days: int = DEFAULT_HISTORY_DAYS,
+                 latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 daily_limit: Optional[int] = None, token_ttl: int = 3600) -> None:
+        self.seed = seed
+        self.animals_per_location = animals_per_location
+        self.location_sizes = location_sizes or {}
+        self.history_days = history_days
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.daily_limit = daily_limit
+        self.token_ttl = token_ttl
+
+
+def _stable_int(text: str) -> int:
+    """Process-independent 32-bit hash of a string (unlike the built-in hash)."""
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+
+
+def make_animal(animal_id: int, location: str, config: MockPetfinderConfig) -> Dict[str, Any]:
+    """
+    Build the synthetic /animals record of an animal id.
+
+    All fields are derived from the id and the seed, so an animal shared by several
+    locations is identical in each of them.
+
+    Args:
+        animal_id (int): Animal id
+        location (str): Location the animal is listed in, used for the contact address
+        config (MockPetfinderConfig): Server settings
+
+    Returns:
+        Dict[str, Any]: Animal record shaped like the PetFinder API response
+    """
+    rng = random.Random(f"{config.seed}:{animal_id}")
+    published = (datetime.fromisoformat(REFERENCE_TIME)
+                 - timedelta(seconds=rng.randrange(config.history_days * 24 * 3600)))
+    photos = [{'small': f"https://photos.example/{animal_id}/{n}/small.jpg",
+               'full': f"https://photos.example/{animal_id}/{n}/full.jpg"} for n in range(rng.randint(0, 4))]
+    name = f"Cat {animal_id % 100000}"
+    return {
+        'id': animal_id,
+        'organization_id': f"MO{rng.randint(1, 400):03d}",
+        'url': f"https://www.petfinder.example/cat/{animal_id}",
+        'type': 'Cat',
+        'species': 'Cat',
+        'breeds': {'primary': rng.choice(_BREEDS), 'secondary': rng.choice([None, rng.choice(_BREEDS)]),
+                   'mixed': rng.random() < 0.3, 'unknown': False},
+        'colors': {'primary': rng.choice(_COLORS), 'secondary': rng.choice(_COLORS), 'tertiary': None},
+        'age': rng.choice(_AGES),
+        'gender': rng.choice(['Male', 'Female']),
+        'size': rng.choice(_SIZES),
+        'coat': rng.choice(_COATS),
+        'attributes': {'spayed_neutered': rng.choice(_FLAGS), 'house_trained': rng.choice(_FLAGS),
+                       'declawed': rng.choice(_FLAGS), 'special_needs': rng.choice(_FLAGS),
+                       'shots_current': rng.choice(_FLAGS)},
+        'environment': {'children': rng.choice(_FLAGS), 'dogs': rng.choice(_FLAGS), 'cats': rng.choice(_FLAGS)},
+        'tags': rng.sample(_TAGS, rng.randint(0, 3)),
+        'name': name,
+        'description': f"{name} is a lovely cat looking for a home." if rng.random() < 0.8 else None,
+        'photos': photos,
+        'primary_photo_cropped': {'full': photos[0]['full'].replace('full', 'cropped')} if photos else None,
+        'status': 'adoptable',
+        'status_changed_at': (published + timedelta(days=rng.randint(0, 60))).isoformat(),
+        'published_at': published.isoformat(),
+        'distance': round(rng.uniform(0, 100), 1) if location.isdigit() else None,
+        'contact': {'email': f"shelter{rng.randint(1, 400)}@example.org", 'phone': None,
+                    'address': {'address1': None, 'address2': None, 'city': 'Mockville',
+                                'state': location if location.isalpha() else 'NV',
+                                'postcode': location if location.isdigit() else f"{rng.randint(10000, 99999)}",
+                                'country': 'US'}},
+    }
+
+
+def location_animal_ids(location: str, config: MockPetfinderConfig) -> List[int]:
+    """
+    Ids of the animals listed in a location.
+
+    Ids come from a range reserved for the location. For ZIP codes, the first ZIP_OVERLAP
+    share come from a range shared by all ZIPs with the same 3-digit prefix instead.
+
+    Args:
+        location (str): State abbreviation or ZIP code
+        config (MockPetfinderConfig): Server settings
+
+    Returns:
+        List[int]: Animal ids
+    """
+    count = config.location_sizes.get(location, config.animals_per_location)
+    base = _stable_int(location) * 100_000
+    if not location.isdigit():
+        return [base + i for i in range(count)]
+
+    shared = int(count * ZIP_OVERLAP)
+    pool_base = _stable_int(location[:3]) * 100_000
+    pool_rng = random.Random(f"{config.seed}:{location}")
+    pool_ids = pool_rng.sample(range(pool_base, pool_base + 2 * max(shared, 1)), shared)
+    return pool_ids + [base + i for i in range(count - shared)]
+
+
+class MockPetfinderServer:
+    """
+    Threaded HTTP server implementing the mock API.
+
+    Attributes:
+        config (MockPetfinderConfig): Server settings
+        stats (Dict[str, Any]): Token and /animals request counts, responses by status code,
+            pages and animals served
+        base_url (Optional[str]): API root to give to the client once started
+    """
+
+    def __init__(self, config: Optional[MockPetfinderConfig] = None, host: str = '127.0.0.1',
+                 port: int = 0) -> None:
+        self.config = config or MockPetfinderConfig()
+        self.stats: Dict[str, Any] = {'token_requests': 0, 'animal_requests': 0, 'pages_served': 0,
+                                      'animals_served': 0, 'status_codes': {}}
+        self.base_url: Optional[str] = None
+        self._tokens: Dict[str, float] = {}
+        self._listings: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> str:
+        """Serve in a background thread and return the API root URL."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        host, port = self._httpd.server_address[:2]
+        self.base_url = f"http://{host}:{port}/v2"
+        return self.base_url
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        host, port = self._httpd.server_address[:2]
+        self.base_url = f"http://{host}:{port}/v2"
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the request statistics."""
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def _listing(self, location: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(published_at, animal) pairs of a location, newest first, built once per location."""
+        with self._lock:
+            listing = self._listings.get(location)
+        if listing is None:
+            animals = [make_animal(animal_id, location, self.config)
+                       for animal_id in location_animal_ids(location, self.config)]
+            listing = sorted(((animal['published_at'], animal) for animal in animals),
+                             key=lambda item: (item[0], item[1]['id']), reverse=True)
+            with self._lock:
+                self._listings[location] = listing
+        return listing
+
+    def _count(self, status_code: int, animals: Optional[int] = None) -> None:
+        with self._lock:
+            codes = self.stats['status_codes']
+            codes[str(status_code)] = codes.get(str(status_code), 0) + 1
+            if animals is not None and status_code == 200:
+                self.stats['pages_served'] += 1
+                self.stats['animals_served'] += animals
+
+    def _issue_token(self, form: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            self.stats['token_requests'] += 1
+        if form.get('grant_type') != 'client_credentials' or not form.get('client_id') or not form.get('client_secret'):
+            return 401, {'type': 'https://www.petfinder.com/developers/v2/docs/errors/ERR-401/',
+                         'status': 401, 'title': 'Unauthorized', 'detail': 'Invalid client credentials'}
+        token = uuid.uuid4().hex
+        with self._lock:
+            now = time.time()
+            self._tokens = {key: expiry for key, expiry in self._tokens.items() if expiry > now}
+            self._tokens[token] = now + self.config.token_ttl
+        return 200, {'token_type': 'Bearer', 'expires_in': self.config.token_ttl, 'access_token': token}
+
+    def _animals(self, query: Dict[str, str], authorization: Optional[str]) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        config = self.config
+        with self._lock:
+            self.stats['animal_requests'] += 1
+            served = self.stats['animal_requests']
+            draw = self._rng.random()
+            token = (authorization or '').replace('Bearer ', '', 1)
+            token_valid = self._tokens.get(token, 0) > time.time()
+
+        if not token_valid:
+            return 401, {'status': 401, 'title': 'Unauthorized', 'detail': 'Access token invalid or expired'}, {}
+        if config.daily_limit is not None and served > config.daily_limit:
+            return 429, {'status': 429, 'title': 'Too Many Requests', 'detail': 'Daily limit reached'}, {}
+        if draw < config.rate_limit_rate:
+            return 429, {'status': 429, 'title': 'Too Many Requests'}, {'Retry-After': f"{config.retry_after:g}"}
+        if draw < config.rate_limit_rate + config.error_rate:
+            return 500, {'status': 500, 'title': 'Internal Server Error'}, {}
+
+        try:
+            limit = int(query.get('limit', 20))
+            page = int(query.get('page', 1))
+        except ValueError:
+            return 400, {'status': 400, 'title': 'Invalid Request', 'detail': 'limit and page must be integers'}, {}
+        if not 1 <= limit <= MAX_PAGE_SIZE or page < 1:
+            return 400, {'status': 400, 'title': 'Invalid Request', 'detail': 'limit or page out of range'}, {}
+
+        listing = self._listing(query.get('location', ''))
+        after = query.get('after')
+        before = query.get('before')
+        if after or before:
+            try:
+                after_time = datetime.fromisoformat(after) if after else None
+                before_time = datetime.fromisoformat(before) if before else None
+            except ValueError:
+                return 400, {'status': 400, 'title': 'Invalid Request', 'detail': 'after/before must be ISO 8601'}, {}
+            listing = [item for item in listing
+                       if (after_time is None or datetime.fromisoformat(item[0]) > after_time)
+                       and (before_time is None or datetime.fromisoformat(item[0]) < before_time)]
+        if query.get('sort') == '-recent':
+            listing = listing[::-1]
+
+        total = len(listing)
+        total_pages = (total + limit - 1) // limit
+        animals = [animal for _, animal in listing[(page - 1) * limit:page * limit]]
+        body = {
+            'animals': animals,
+            'pagination': {'count_per_page': limit, 'total_count': total,
+                           'current_page': page, 'total_pages': total_pages, '_links': {}}
+        }
+        return 200, body, {}
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send(self, status_code: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get('Content-Length', 0))
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                if urlparse(self.path).path != '/v2/oauth2/token':
+                    return self._send(404, {'status': 404, 'title': 'Not Found'})
+                status_code, body = server._issue_token(form)
+                server._count(status_code)
+                self._send(status_code, body)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path == '/stats':
+                    return self._send(200, server.snapshot())
+                if url.path != '/v2/animals':
+                    return self._send(404, {'status': 404, 'title': 'Not Found'})
+
+                delay = server.config.latency + random.uniform(0, server.config.latency_jitter)
+                if delay > 0:
+                    time.sleep(delay)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                status_code, body, headers = server._animals(query, self.headers.get('Authorization'))
+                server._count(status_code, len(body.get('animals', [])))
+                self._send(status_code, body, headers)
+
+        return Handler
+
+
+def main() -> None:
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Serve a local mock of the PetFinder API v2.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data and failure injection")
+    parser.add_argument('--animals-per-location', type=int, default=DEFAULT_ANIMALS_PER_LOCATION)
+    parser.add_argument('--location-sizes', type=json.loads, default=None,
+                        help='JSON object of animals per location, e.g. \'{"CA": 20000}\'')
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before every /animals response")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of /animals requests failing with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of /animals requests failing with 429")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After seconds of injected 429s")
+    parser.add_argument('--daily-limit', type=int, default=None, help="/animals requests served before 429s")
+    parser.add_argument('--token-ttl', type=int, default=3600, help="Seconds an access token is valid")
+    args = parser.parse_args()
+
+    config = MockPetfinderConfig(seed=args.seed, animals_per_location=args.animals_per_location,
+                                 location_sizes=args.location_sizes, latency=args.latency,
+                                 latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                                 rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+                                 daily_limit=args.daily_limit, token_ttl=args.token_ttl)
+    server = MockPetfinderServer(config, host=args.host, port=args.port)
+    print(f"Mock PetFinder API listening on http://{args.host}:{args.port}/v2 (stats at /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
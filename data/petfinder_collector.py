@@ -9,7 +9,7 @@ Key Features:
 - Collects data for any animal type (cats, dogs, rabbits, etc.) and status (adoptable, adopted)
 - State-based collection across all US states plus Washington DC
 - Progress tracking and resumption capability to handle API rate limits
-- Automatic retry logic with exponential backoff for failed requests
+- Automatic retry logic with jittered exponential backoff for failed requests
 - Data deduplication and file combining functionality
 - Comprehensive logging for monitoring collection progress
 
@@ -24,9 +24,14 @@ Usage:
 4. Combined data files are saved with deduplication applied
 
 Rate Limit Management:
-- Implements 2-second delays between requests
+- Shares one token-bucket rate limiter across all requests, sized to the API quota
+- Persists the daily request count so the daily cap holds across restarts
+- Collects several locations concurrently under the shared limiter
+- Prefetches upcoming pages of a location while keeping the resume point exact
+- Skips animals already collected from an overlapping location and reports the overlap
+- Adapts the request rate to 429s, Retry-After and rate limit headers from the server
 - Tracks partial completion when hitting daily limits
-- Saves progress after each state to enable resumption
+- Streams pages to disk and checkpoints the resume page after each durable flush
 - Provides detailed status summaries for monitoring progress
 
 Petfinder API Documentation:
@@ -37,28 +42,67 @@ import requests
 import pandas as pd
 import numpy as np
 import json
-from datetime import date, datetime
+from datetime import datetime, timezone
 import time
 import logging
+import hashlib
 import os
+import random
+import re
+import shutil
+import signal
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Dict, List, Optional, Any
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('petfinder_collection.log'),
-        logging.StreamHandler()
-    ]
-)
+from typing import Callable, Dict, Iterator, List, Optional, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: the token cache still works, refreshes are just not serialised
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 # Global configurations
 ANIMAL_TYPE: str = 'cat'  # Change this to 'dog', 'rabbit', etc.
 ADOPTION_STATUS: str = 'adopted' # Change this to 'adoptable' to collect currently available pets for adoption
 PUBLISHED_AFTER_DATE: str = '2019-12-31T23:59:59+00:00'  # published date cut off for adopted set - after 2019
+MAX_CONCURRENT_LOCATIONS: int = 4  # number of states/ZIPs collected in parallel
+DELTA_MODE: bool = False  # only fetch animals published since each location's last run, then merge ('adoptable' only)
+SERVICE_MODE: bool = False  # keep running unattended, sleeping through quota resets, until every status is collected
+SERVICE_STATUSES: List[str] = ['adopted', 'adoptable']  # statuses swept in service mode, in order
+SERVICE_REPEAT_HOURS: Optional[float] = None  # in service mode, start a new sweep this long after one finishes
+DRY_RUN: bool = False  # probe page 1 of each location and log the request plan instead of collecting
+RUN_ID: Optional[str] = None  # collect/combine this run directory instead of the current run, e.g. '2025-08-11'
+PAGE_PREFETCH_WINDOW: int = 4  # pages of a single location kept in flight at once
+WINDOW_TARGET_PAGES: Optional[int] = None  # split locations with more pages into published-date windows of about this many pages
+FLUSH_EVERY_PAGES: int = 1  # pages buffered in memory before they are written to disk
+JOURNAL_COMPACT_BYTES: int = 1 << 20  # progress journal size that triggers a compaction
+OUTPUT_FORMAT: str = 'csv'  # 'csv' or 'parquet' (requires pyarrow) for state and combined files
+PARQUET_COMPRESSION: str = 'zstd'
+PARQUET_ROW_GROUP_SIZE: int = 100_000
+COMBINE_CHUNK_SIZE: int = 100_000  # rows read at a time when combining state files
+
+PETFINDER_API_URL: str = 'https://api.petfinder.com/v2'  # point at mock_petfinder_server.py to run offline
+
+# PetFinder API quotas per API key
+DAILY_REQUEST_LIMIT: int = 1000
+REQUESTS_PER_SECOND: float = 50
+MIN_REQUESTS_PER_SECOND: float = 0.5  # floor the adaptive limiter backs off to
+RATE_LIMIT_STATE_FILE: str = 'rate_limit_state.json'  # persists the daily request count across restarts
+MAX_REQUEST_ATTEMPTS: int = 5
+SERVICE_STATUS_FILE: str = 'collector_service_status.json'  # state of the service, for monitoring
+LOG_FILE: str = 'petfinder_collection.log'
+QUOTA_RESET_MARGIN: float = 60  # seconds the service sleeps past the daily reset before resuming
+FAILED_RETRY_DELAY: float = 300  # wait before unfinished locations are retried, doubled each round
+MAX_FAILED_RETRIES: int = 5  # retry rounds before a status is left unfinished for the sweep
+TOKEN_CACHE_FILE: Optional[str] = os.path.join(os.path.expanduser('~'), '.cache', 'petfinder', 'tokens.json')  # None disables
+TOKEN_REFRESH_MARGIN: float = 300  # seconds before expiry a token is replaced
+# Statuses a `published_at` watermark can refresh: their listings only change by being published
+DELTA_STATUSES: List[str] = ['adoptable']
 
 # Due to a bug in the PetFinder API, I was encouraged to use zipcodes for the state of Nevada
 # All other states and DC simply used their state abbreviation
@@ -74,6 +118,694 @@ DEFAULT_US_STATES: List[str] = [
 US_STATES: List[str] = NV_POSTCODES + DEFAULT_US_STATES
 
 
+# Column layout and dtypes of the collected animal files. Text and nullable flags stay
+# as object columns, which keeps building a page batch cheap.
+ANIMAL_SCHEMA: Dict[str, str] = {
+    # Basic info
+    'id': 'int64', 'org_id': 'object', 'url': 'object', 'type': 'object', 'species': 'object',
+    'age': 'object', 'gender': 'object', 'size': 'object', 'coat': 'object', 'name': 'object',
+    'description': 'object', 'status': 'object', 'status_changed_at': 'object',
+    'published_at': 'object', 'distance': 'float64',
+    # Breeds
+    'breeds_primary': 'object', 'breeds_secondary': 'object', 'breeds_mixed': 'object',
+    'breeds_unknown': 'object',
+    # Colors
+    'colors_primary': 'object', 'colors_secondary': 'object', 'colors_tertiary': 'object',
+    # Attributes
+    'spayed_neutered': 'object', 'house_trained': 'object', 'declawed': 'object',
+    'special_needs': 'object', 'shots_current': 'object',
+    # Environment
+    'env_children': 'object', 'env_dogs': 'object', 'env_cats': 'object',
+    # Contact
+    'contact_email': 'object', 'contact_phone': 'object', 'contact_address1': 'object',
+    'contact_address2': 'object', 'contact_city': 'object', 'contact_state': 'object',
+    'contact_postcode': 'object', 'contact_country': 'object',
+    # Photos
+    'photo_count': 'int64', 'photo': 'object', 'primary_photo_cropped': 'object',
+    # Tags
+    'tags': 'object',
+    # Metadata
+    'stateQ': 'object', 'accessed': 'datetime64[ns, UTC]',
+}
+
+# Object columns that hold nullable booleans, typed as such in Parquet files
+ANIMAL_FLAG_COLUMNS: List[str] = [
+    'breeds_mixed', 'breeds_unknown', 'spayed_neutered', 'house_trained', 'declawed',
+    'special_needs', 'shots_current', 'env_children', 'env_dogs', 'env_cats',
+]
+
+# Columns copied straight from the API response: column -> (nested object, key)
+_ANIMAL_FIELDS: Dict[str, tuple] = {
+    'id': ('animal', 'id'), 'org_id': ('animal', 'organization_id'), 'url': ('animal', 'url'),
+    'type': ('animal', 'type'), 'species': ('animal', 'species'), 'age': ('animal', 'age'),
+    'gender': ('animal', 'gender'), 'size': ('animal', 'size'), 'coat': ('animal', 'coat'),
+    'name': ('animal', 'name'), 'description': ('animal', 'description'),
+    'status': ('animal', 'status'), 'status_changed_at': ('animal', 'status_changed_at'),
+    'published_at': ('animal', 'published_at'), 'distance': ('animal', 'distance'),
+    'breeds_primary': ('breeds', 'primary'), 'breeds_secondary': ('breeds', 'secondary'),
+    'breeds_mixed': ('breeds', 'mixed'), 'breeds_unknown': ('breeds', 'unknown'),
+    'colors_primary': ('colors', 'primary'), 'colors_secondary': ('colors', 'secondary'),
+    'colors_tertiary': ('colors', 'tertiary'),
+    'spayed_neutered': ('attributes', 'spayed_neutered'), 'house_trained': ('attributes', 'house_trained'),
+    'declawed': ('attributes', 'declawed'), 'special_needs': ('attributes', 'special_needs'),
+    'shots_current': ('attributes', 'shots_current'),
+    'env_children': ('environment', 'children'), 'env_dogs': ('environment', 'dogs'),
+    'env_cats': ('environment', 'cats'),
+    'contact_email': ('contact', 'email'), 'contact_phone': ('contact', 'phone'),
+    'contact_address1': ('address', 'address1'), 'contact_address2': ('address', 'address2'),
+    'contact_city': ('address', 'city'), 'contact_state': ('address', 'state'),
+    'contact_postcode': ('address', 'postcode'), 'contact_country': ('address', 'country'),
+}
+
+
+def _utc_today() -> str:
+    """Current UTC date, the day the API quota is counted in and runs are named after."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class DailyRequestLimitReached(Exception):
+    """Raised when the daily API request budget has been used up."""
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket shared by every request a client makes.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`, which bounds the
+    burst size, so any number of worker threads together never exceed the per-second
+    quota. Every request is also counted against a daily budget that is persisted to
+    `state_file`, so restarting the script does not reset the count.
+    
+    Attributes:
+        rate (float): Tokens added per second
+        capacity (float): Maximum number of tokens held (burst size)
+        daily_limit (int): Maximum requests per UTC day
+        state_file (Optional[str]): JSON file persisting the daily request count
+    """
+    
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, capacity: Optional[float] = None,
+                 daily_limit: int = DAILY_REQUEST_LIMIT,
+                 state_file: Optional[str] = RATE_LIMIT_STATE_FILE) -> None:
+        """
+        Initialize the limiter and restore today's request count from `state_file`.
+        
+        Args:
+            rate (float): Requests per second allowed on average
+            capacity (Optional[float]): Burst size, defaults to one second worth of tokens
+            daily_limit (int): Maximum requests per UTC day
+            state_file (Optional[str]): Where to persist the daily count, None to disable
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.daily_limit = daily_limit
+        self.state_file = state_file
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._day, self._requests_today = self._load_state()
+    
+    @staticmethod
+    def _today() -> str:
+        return _utc_today()
+    
+    def _load_state(self) -> tuple:
+        """Return (day, requests made that day), ignoring counts from previous days."""
+        today = self._today()
+        if self.state_file and os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    state = json.load(f)
+                if state.get('date') == today:
+                    return today, int(state.get('requests', 0))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read rate limit state from {self.state_file}: {e}")
+        return today, 0
+    
+    def _save_state(self) -> None:
+        """Atomically persist the daily count. Caller must hold the lock."""
+        if not self.state_file:
+            return
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'date': self._day, 'requests': self._requests_today}, f)
+        os.replace(tmp_file, self.state_file)
+    
+    def _roll_day(self) -> None:
+        """Reset the daily count when the UTC date changes. Caller must hold the lock."""
+        today = self._today()
+        if today != self._day:
+            self._day, self._requests_today = today, 0
+    
+    @staticmethod
+    def seconds_until_reset() -> float:
+        """Seconds until the daily budget resets at the next UTC midnight."""
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(now.date(), datetime.min.time(), tzinfo=timezone.utc)
+        return (midnight - now).total_seconds() + 24 * 3600
+    
+    @property
+    def remaining_today(self) -> int:
+        """Number of requests left in today's budget."""
+        with self._lock:
+            self._roll_day()
+            return max(0, self.daily_limit - self._requests_today)
+    
+    def acquire(self) -> None:
+        """
+        Block until a request may be made, then count it against the daily budget.
+        
+        Raises:
+            DailyRequestLimitReached: If today's budget is already used up
+        """
+        while True:
+            with self._lock:
+                self._roll_day()
+                if self._requests_today >= self.daily_limit:
+                    raise DailyRequestLimitReached(
+                        f"Daily limit of {self.daily_limit} requests reached for {self._day} (UTC)"
+                    )
+                
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_time = self._paused_until - now
+                else:
+                    elapsed = max(0.0, now - self._last_refill)
+                    self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                    self._last_refill = now
+                    
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._requests_today += 1
+                        self._save_state()
+                        return
+                    
+                    wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+    
+    def exhaust_today(self) -> None:
+        """Count today's budget as used up, e.g. when the server's quota ran out first."""
+        with self._lock:
+            self._roll_day()
+            self._requests_today = max(self._requests_today, self.daily_limit)
+            self._save_state()
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds`, with no burst allowance when it ends."""
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            if resume_at > self._paused_until:
+                self._paused_until = resume_at
+                self._tokens = 0.0
+                self._last_refill = resume_at
+
+
+class AdaptiveRateLimiter(TokenBucketRateLimiter):
+    """
+    Token bucket whose rate follows the server's feedback.
+    
+    The rate is adjusted additive-increase/multiplicative-decrease style: every successful
+    response nudges it up towards `max_rate`, every 429 halves it (down to `min_rate`) and
+    pauses all callers for the server's `Retry-After`, or for a jittered exponential
+    backoff when the header is missing. Standard rate limit headers
+    (`X-RateLimit-Remaining`/`RateLimit-Remaining` with the matching `*-Reset`) pause
+    callers until the window resets once the server reports no requests remaining.
+    
+    Attributes:
+        min_rate (float): Lowest rate the limiter backs off to
+        max_rate (float): Highest rate the limiter speeds up to
+        increase_step (float): Requests/second added after each successful response
+        decrease_factor (float): Multiplier applied to the rate after a 429
+        backoff_base (float): First backoff delay in seconds
+        backoff_cap (float): Longest backoff delay in seconds
+    """
+    
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, min_rate: float = MIN_REQUESTS_PER_SECOND,
+                 max_rate: Optional[float] = None, increase_step: float = 0.5,
+                 decrease_factor: float = 0.5, backoff_base: float = 1.0, backoff_cap: float = 60.0,
+                 **kwargs: Any) -> None:
+        """
+        Initialize the adaptive limiter.
+        
+        Args:
+            rate (float): Starting requests per second
+            min_rate (float): Lowest rate to back off to
+            max_rate (Optional[float]): Highest rate to speed up to, defaults to `rate`
+            increase_step (float): Rate increase after each successful response
+            decrease_factor (float): Rate multiplier after a 429
+            backoff_base (float): First backoff delay in seconds
+            backoff_cap (float): Longest backoff delay in seconds
+            **kwargs: Passed to TokenBucketRateLimiter (capacity, daily_limit, state_file)
+        """
+        super().__init__(rate=rate, **kwargs)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+    
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+    
+    def record_response(self, response: requests.Response, attempt: int = 0) -> Optional[float]:
+        """
+        Adapt the rate to a response.
+        
+        Args:
+            response (requests.Response): Response to learn from
+            attempt (int): Zero-based attempt number of the request, used for backoff
+            
+        Returns:
+            Optional[float]: Seconds all callers are paused for, if the response caused a pause
+        """
+        pause_for = None
+        
+        if response.status_code == 429:
+            with self._lock:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+            pause_for = retry_after if retry_after is not None else self.backoff_delay(attempt)
+        elif response.status_code < 400:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+        
+        remaining = _first_header(response.headers, ('X-RateLimit-Remaining', 'RateLimit-Remaining'))
+        reset = _first_header(response.headers, ('X-RateLimit-Reset', 'RateLimit-Reset'))
+        if remaining is not None and reset is not None:
+            try:
+                if int(float(remaining)) <= 0:
+                    reset_seconds = float(reset)
+                    # Large values are epoch timestamps rather than delta seconds
+                    if reset_seconds > 1e9:
+                        reset_seconds -= time.time()
+                    pause_for = max(pause_for or 0.0, reset_seconds)
+            except ValueError:
+                pass
+        
+        if pause_for:
+            self.pause(pause_for)
+        return pause_for
+
+
+def _later_timestamp(first: Optional[str], second: Optional[str]) -> Optional[str]:
+    """Return the later of two ISO timestamps, ignoring missing ones."""
+    if not first or not second:
+        return first or second
+    return first if pd.Timestamp(first) >= pd.Timestamp(second) else second
+
+
+def _check_delta_status(status: str) -> None:
+    """
+    Refuse delta runs for statuses a `published_at` watermark would refresh incompletely.
+
+    An animal becomes e.g. 'adopted' at its `status_changed_at`, usually long after it was
+    published, and the API can only sort and filter by publication date. A delta run would
+    therefore skip every animal published before the watermark and adopted since.
+
+    Raises:
+        ValueError: If the status is not in DELTA_STATUSES
+    """
+    if status not in DELTA_STATUSES:
+        raise ValueError(
+            f"Delta runs only support statuses {DELTA_STATUSES}: '{status}' animals change status "
+            f"after they are published, and the API cannot filter by status_changed_at, so a "
+            f"published_at watermark would miss them. Run a full sweep for '{status}' instead.")
+
+
+def _window_unit(location: str, window: int) -> str:
+    """Progress key and file name prefix of a published-date window of a location."""
+    return f"{location}.w{window:02d}"
+
+
+def _split_unit(unit: str) -> tuple:
+    """Return (location, window index or None) of a progress key."""
+    location, _, window = unit.partition('.w')
+    return location, int(window) if window else None
+
+
+def _overlap_ratio(overlap: Dict[str, int]) -> float:
+    """Share of fetched animals that had already been collected from another location."""
+    return overlap['duplicates'] / overlap['fetched'] if overlap['fetched'] else 0.0
+
+
+def schedule_pages(pages: Dict[str, int], daily_budget: int,
+                   first_day_budget: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Pack the requests of each location into days of request budget.
+    
+    Uses the fewest days that hold every request. Locations are placed whole, largest
+    first, on the first day with room left (first-fit decreasing). A location that fits
+    no day whole is split over the days with room left, in day order, so its pages stay
+    in order. Within a day the continuation of a split location comes first and the
+    location continuing on the next day comes last, so each day ends on the split.
+    
+    Args:
+        pages (Dict[str, int]): Requests needed per location
+        daily_budget (int): Requests available per day
+        first_day_budget (Optional[int]): Requests left today, defaults to `daily_budget`
+        
+    Returns:
+        List[List[Dict[str, Any]]]: One list per day of entries with `location`, `requests`,
+            `continued` (started on an earlier day) and `continues` (finished on a later day)
+    """
+    if daily_budget <= 0:
+        raise ValueError("daily_budget must be positive")
+    first_day_budget = daily_budget if first_day_budget is None else max(0, first_day_budget)
+    
+    room = [first_day_budget]
+    while sum(room) < sum(pages.values()):
+        room.append(daily_budget)
+    days: List[List[Dict[str, Any]]] = [[] for _ in room]
+    
+    for location, count in sorted(pages.items(), key=lambda item: -item[1]):
+        day = next((i for i, left in enumerate(room) if left >= count), None)
+        if day is not None:
+            days[day].append({'location': location, 'requests': count, 'continued': False, 'continues': False})
+            room[day] -= count
+            continue
+        
+        parts = []
+        for i, left in enumerate(room):
+            if count and left:
+                take = min(left, count)
+                parts.append({'location': location, 'requests': take, 'day': i})
+                room[i] -= take
+                count -= take
+        for index, part in enumerate(parts):
+            days[part.pop('day')].append(dict(part, continued=index > 0, continues=index < len(parts) - 1))
+    
+    for day in days:
+        day.sort(key=lambda entry: (not entry['continued'], entry['continues']))
+    return days
+
+
+def _first_header(headers: Any, names: tuple) -> Optional[str]:
+    """Return the value of the first header in `names` that is present."""
+    for name in names:
+        if name in headers:
+            return headers[name]
+    return None
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as delta seconds or as an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+
+def _require_pyarrow() -> None:
+    """Raise a helpful ImportError if pyarrow, needed for Parquet files, is missing."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+
+
+def _animal_arrow_schema(df: pd.DataFrame) -> Any:
+    """Fixed Arrow schema for collected animal columns, extra columns are inferred."""
+    import pyarrow as pa
+    
+    types = {'int64': pa.int64(), 'float64': pa.float64(),
+             'datetime64[ns, UTC]': pa.timestamp('ns', tz='UTC')}
+    extra_columns = [column for column in df.columns if column not in ANIMAL_SCHEMA]
+    inferred = pa.Schema.from_pandas(df[extra_columns], preserve_index=False) if extra_columns else None
+    
+    fields = []
+    for column in df.columns:
+        if column in ANIMAL_FLAG_COLUMNS:
+            fields.append(pa.field(column, pa.bool_()))
+        elif column in ANIMAL_SCHEMA:
+            fields.append(pa.field(column, types.get(ANIMAL_SCHEMA[column], pa.string())))
+        else:
+            fields.append(inferred.field(column))
+    return pa.schema(fields)
+
+
+def write_parquet(df: pd.DataFrame, path: str) -> None:
+    """
+    Write animal records to a compressed Parquet file with row groups.
+    
+    Collected animal columns always get the same Arrow types, even when a batch holds
+    only nulls for a column, so state part files and combined files share one schema.
+    
+    Args:
+        df (pd.DataFrame): Animal records
+        path (str): Output file
+    """
+    _require_pyarrow()
+    df.to_parquet(path, engine='pyarrow', index=False, compression=PARQUET_COMPRESSION,
+                  row_group_size=PARQUET_ROW_GROUP_SIZE, schema=_animal_arrow_schema(df))
+
+
+
+def _open_parquet_writer(path: str, first_chunk: pd.DataFrame) -> Any:
+    """Open a ParquetWriter for incremental writes, with the schema of the animal columns."""
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+    
+    return pq.ParquetWriter(path, _animal_arrow_schema(first_chunk), compression=PARQUET_COMPRESSION)
+
+
+def _write_parquet_chunk(writer: Any, chunk: pd.DataFrame) -> None:
+    """Append a chunk to an open ParquetWriter as row groups of PARQUET_ROW_GROUP_SIZE."""
+    import pyarrow as pa
+    
+    table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+    writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+
+def read_animal_file(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a state or combined file written by the collector, in either output format.
+    
+    Args:
+        path (str): CSV file, Parquet file or Parquet state directory
+        columns (Optional[List[str]]): Subset of columns to load
+        
+    Returns:
+        pd.DataFrame: File contents
+    """
+    if path.endswith('.parquet'):
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_animal_file(path: str, chunksize: int = COMBINE_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read a state or combined file in chunks, in file order.
+    
+    Args:
+        path (str): CSV file, Parquet file or Parquet state directory
+        chunksize (int): Maximum rows per chunk
+        
+    Yields:
+        pd.DataFrame: Consecutive chunks of the file
+    """
+    if not path.endswith('.parquet'):
+        yield from pd.read_csv(path, chunksize=chunksize)
+        return
+    
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+    
+    if os.path.isdir(path):
+        part_files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.parquet'))
+    else:
+        part_files = [path]
+    for part_file in part_files:
+        for batch in pq.ParquetFile(part_file).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+
+class SortedIdSet:
+    """
+    Compact set of int64 animal ids, stored as one sorted numpy array (8 bytes per id).
+    
+    Used to deduplicate streams of records without holding the records themselves, at a
+    fraction of the memory of a Python set of ints.
+    """
+    
+    def __init__(self) -> None:
+        self._ids = np.empty(0, dtype='int64')
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of which `ids` are already in the set."""
+        ids = np.asarray(ids, dtype='int64')
+        known = self._ids  # add_new swaps in a new array, so readers work on one snapshot
+        positions = np.searchsorted(known, ids)
+        found = positions < len(known)
+        found[found] = known[positions[found]] == ids[found]
+        return found
+    
+    def add_new(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Add ids to the set and flag the ones that were not seen before.
+        
+        Args:
+            ids (np.ndarray): Ids to add, possibly with repeats
+            
+        Returns:
+            np.ndarray: Boolean mask, True for the first occurrence of each id not already in the set
+        """
+        ids = np.asarray(ids, dtype='int64')
+        unique_ids, first_index = np.unique(ids, return_index=True)
+        fresh = ~self.contains(unique_ids)
+        
+        mask = np.zeros(len(ids), dtype=bool)
+        mask[first_index[fresh]] = True
+        
+        new_ids = unique_ids[fresh]
+        self._ids = np.insert(self._ids, np.searchsorted(self._ids, new_ids), new_ids)
+        return mask
+
+
+class SeenIdIndex:
+    """
+    Persistent index of the animal ids already written during a collection run.
+    
+    Shared by all locations so overlapping queries (e.g. the Nevada ZIP radius searches) can
+    skip animals another location already saved. Ids live in memory as a SortedIdSet and on
+    disk as an append-only log of int64 values. Only the first `committed_count` ids of the
+    log are trusted: that count is saved in the progress file together with each page
+    checkpoint, so after a crash the index matches exactly the data the checkpoints cover.
+    
+    Attributes:
+        path (str): Log file holding the committed ids
+        count (int): Number of ids committed to the log
+    """
+    
+    def __init__(self, path: str, committed_count: int = 0) -> None:
+        """
+        Load the committed ids from the log, discarding any uncommitted tail.
+        
+        Args:
+            path (str): Log file of ids, created if missing
+            committed_count (int): Number of ids covered by the last saved checkpoint
+        """
+        self.path = path
+        self._ids = SortedIdSet()
+        
+        ids = np.empty(0, dtype='<i8')
+        if committed_count and os.path.exists(path):
+            ids = np.fromfile(path, dtype='<i8', count=committed_count)
+        self._ids.add_new(ids)
+        self.count = len(ids)
+        
+        with open(path, 'ab') as f:
+            f.truncate(self.count * 8)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of which `ids` have already been written."""
+        return self._ids.contains(ids)
+    
+    def commit(self, ids: List[int]) -> None:
+        """
+        Durably record ids whose rows are on disk. Callers serialise commits and save
+        `count` with the matching checkpoint.
+        
+        Args:
+            ids (List[int]): Ids written since the last commit
+        """
+        ids = np.asarray(ids, dtype='<i8')
+        new_ids = ids[self._ids.add_new(ids)]
+        if not len(new_ids):
+            return
+        with open(self.path, 'ab') as f:
+            f.write(new_ids.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(new_ids)
+
+class TokenCache:
+    """
+    OAuth access tokens shared by every client on the machine, keyed by API key.
+    
+    The cache is a JSON file mapping a hash of the API URL and key to a token and its
+    expiry time. Clients hold an exclusive lock on a sidecar `.lock` file while they
+    check the cache and, if no valid token is cached, fetch one, so clients started
+    together authenticate once and the others pick up the new token.
+    
+    Args:
+        path (str): Cache file, created with owner-only permissions
+    """
+    
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock_path = f"{path}.lock"
+    
+    @staticmethod
+    def _key(base_url: str, api_key: str) -> str:
+        return hashlib.sha256(f"{base_url} {api_key}".encode()).hexdigest()
+    
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the cache's inter-process lock."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def get(self, base_url: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached token of an API key.
+        
+        Args:
+            base_url (str): API base URL the token was issued by
+            api_key (str): PetFinder API key
+            
+        Returns:
+            Optional[Dict[str, Any]]: `access_token` and `expires_at` (Unix time), if cached
+        """
+        return self._load().get(self._key(base_url, api_key))
+    
+    def put(self, base_url: str, api_key: str, access_token: str, expires_at: float) -> None:
+        """
+        Atomically store a token, dropping expired tokens of other keys. Call while locked.
+        
+        Args:
+            base_url (str): API base URL the token was issued by
+            api_key (str): PetFinder API key
+            access_token (str): OAuth access token
+            expires_at (float): Unix time the token expires
+        """
+        now = time.time()
+        tokens = {key: entry for key, entry in self._load().items() if entry.get('expires_at', 0) > now}
+        tokens[self._key(base_url, api_key)] = {'access_token': access_token, 'expires_at': expires_at}
+        tmp_file = f"{self.path}.tmp"
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tokens, f)
+        os.replace(tmp_file, self.path)
+
 class StateBasedPetfinderClient:
     """
     A client for collecting PetFinder API data across US states with session management.
@@ -88,59 +820,111 @@ class StateBasedPetfinderClient:
         base_url (str): Base URL for PetFinder API v2
         access_token (Optional[str]): Current OAuth2 access token
         token_expires_at (Optional[float]): Unix timestamp when token expires
-        session (requests.Session): HTTP session for connection pooling
+        session (requests.Session): HTTP session for connection pooling, used for auth too
+        token_cache (Optional[TokenCache]): Token cache shared with other clients, if enabled
+        rate_limiter (TokenBucketRateLimiter): Limiter shared by all requests, including
+            those made concurrently from worker threads
+        output_format (str): File format of state and combined files, 'csv' or 'parquet'
+        run_id (Optional[str]): Run directory used instead of the current run, if given
     """
     
-    def __init__(self, api_key: str, secret: str) -> None:
+    def __init__(self, api_key: str, secret: str,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 output_format: str = OUTPUT_FORMAT, run_id: Optional[str] = None,
+                 token_cache_file: Optional[str] = TOKEN_CACHE_FILE,
+                 base_url: str = PETFINDER_API_URL) -> None:
         """
         Initialize the PetFinder API client with credentials.
         
         Args:
             api_key (str): PetFinder API key
             secret (str): PetFinder API secret key
+            rate_limiter (Optional[TokenBucketRateLimiter]): Limiter to use, defaults to an
+                AdaptiveRateLimiter sized to the API quota that persists its daily count to
+                RATE_LIMIT_STATE_FILE
+            output_format (str): 'csv', or 'parquet' for typed, compressed files with row groups
+            run_id (Optional[str]): Run to collect, combine and report on instead of the current
+                run recorded in `{animal_type}/run_{status}.json`
+            token_cache_file (Optional[str]): File caching access tokens across processes and
+                runs, None to always authenticate
+            base_url (str): API root, e.g. the URL of a local mock_petfinder_server.py
             
         Raises:
+            ValueError: If the output format is not supported
+            ImportError: If Parquet output is requested but pyarrow is not installed
             requests.exceptions.RequestException: If initial authentication fails
         """
         self.api_key = api_key
         self.secret = secret
-        self.base_url = "https://api.petfinder.com/v2"
+        self.base_url = base_url.rstrip('/')
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[float] = None
         self.session = requests.Session()
+        self.token_cache = TokenCache(token_cache_file) if token_cache_file else None
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        if output_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported output format: {output_format}")
+        if output_format == 'parquet':
+            _require_pyarrow()
+        self.output_format = output_format
+        self.run_id = run_id
+        self._run_ids: Dict[tuple, str] = {}  # current run per (animal_type, status)
+        self._auth_lock = threading.Lock()
+        self._progress_lock = threading.Lock()
+        self._probed_pages: Dict[tuple, Dict[str, Any]] = {}  # page 1 read by plan_windows, by query
         self._authenticate()
     
-    def _authenticate(self) -> None:
+    def _authenticate(self, rejected_token: Optional[str] = None) -> None:
         """
         Authenticate with PetFinder API using OAuth2 client credentials flow.
         
-        Updates the instance's access_token and token_expires_at attributes.
+        Updates the instance's access_token and token_expires_at attributes. With a token
+        cache, a cached token that is neither close to expiry nor `rejected_token` is reused
+        without a request, and a newly fetched token is cached for other clients.
+        
+        Args:
+            rejected_token (Optional[str]): Token the API just refused, never reused
         
         Raises:
             requests.exceptions.RequestException: If authentication request fails
             KeyError: If response doesn't contain expected token data
         """
-        auth_url = f"{self.base_url}/oauth2/token"
-        auth_data = {
-            'grant_type': 'client_credentials',
-            'client_id': self.api_key,
-            'client_secret': self.secret
-        }
-        
-        response = requests.post(auth_url, data=auth_data)
-        response.raise_for_status()
-        
-        token_data = response.json()
-        self.access_token = token_data['access_token']
-        self.token_expires_at = time.time() + token_data.get('expires_in', 3600)
-        logger.info("Successfully authenticated with Petfinder API")
+        with self.token_cache.locked() if self.token_cache else nullcontext():
+            if self.token_cache:
+                cached = self.token_cache.get(self.base_url, self.api_key)
+                if (cached and cached['access_token'] != rejected_token
+                        and cached['expires_at'] - time.time() > TOKEN_REFRESH_MARGIN):
+                    self.access_token = cached['access_token']
+                    self.token_expires_at = cached['expires_at']
+                    logger.info("Using cached Petfinder API token")
+                    return
+            
+            auth_url = f"{self.base_url}/oauth2/token"
+            auth_data = {
+                'grant_type': 'client_credentials',
+                'client_id': self.api_key,
+                'client_secret': self.secret
+            }
+            
+            response = self.session.post(auth_url, data=auth_data, timeout=30)
+            response.raise_for_status()
+            
+            token_data = response.json()
+            self.access_token = token_data['access_token']
+            self.token_expires_at = time.time() + token_data.get('expires_in', 3600)
+            if self.token_cache:
+                self.token_cache.put(self.base_url, self.api_key, self.access_token, self.token_expires_at)
+            logger.info("Successfully authenticated with Petfinder API")
     
     def _make_request(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
         """
         Make authenticated HTTP request with automatic retry and token refresh.
         
-        Implements exponential backoff for rate limiting and automatic token refresh
-        when tokens are near expiration.
+        Implements jittered exponential backoff for failed requests, honours the server's
+        Retry-After and rate limit headers through the adaptive rate limiter, and refreshes
+        the token automatically when it is near expiration. If every attempt is answered
+        with 429, the server's daily quota is taken to be used up (e.g. by another process
+        sharing the key), and so is the limiter's.
         
         Args:
             url (str): Full URL to make request to
@@ -151,222 +935,793 @@ class StateBasedPetfinderClient:
             
         Raises:
             Exception: If all retry attempts fail
+            DailyRequestLimitReached: If the daily request budget, or the server's quota, is used up
             requests.exceptions.RequestException: For various HTTP errors
         """
-        # Check token expiry
-        if time.time() > (self.token_expires_at - 300):
-            logger.info("Refreshing token...")
-            self._authenticate()
-        
-        headers = {'Authorization': f'Bearer {self.access_token}'}
+        # Check token expiry (only one thread refreshes)
+        with self._auth_lock:
+            if time.time() > (self.token_expires_at - TOKEN_REFRESH_MARGIN):
+                logger.info("Refreshing token...")
+                self._authenticate()
         
-        for attempt in range(3):
+        rate_limited = 0
+        for attempt in range(MAX_REQUEST_ATTEMPTS):
+            # Shared rate limiting across all threads
+            self.rate_limiter.acquire()
+            
             try:
-                time.sleep(2)  # Simple rate limiting
-                
+                token = self.access_token
+                headers = {'Authorization': f'Bearer {token}'}
                 response = self.session.get(url, headers=headers, params=params, timeout=30)
                 
+                # Let the limiter learn from the server's feedback (Retry-After, rate limit headers)
+                pause_for = None
+                if isinstance(self.rate_limiter, AdaptiveRateLimiter):
+                    pause_for = self.rate_limiter.record_response(response, attempt)
+                
                 if response.status_code == 200:
                     return response
                 elif response.status_code == 429:
-                    wait_time = 10 * (attempt + 1)
-                    logger.warning(f"Rate limited. Waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                    rate_limited += 1
+                    if pause_for is None:
+                        pause_for = self._backoff_delay(attempt)
+                        self.rate_limiter.pause(pause_for)
+                    logger.warning(f"Rate limited. Waiting {pause_for:.1f}s...")
                     continue
                 elif response.status_code == 401:
                     logger.warning("Auth failed, refreshing token...")
-                    self._authenticate()
+                    with self._auth_lock:
+                        # Another thread may already have replaced the refused token
+                        if self.access_token == token:
+                            self._authenticate(rejected_token=token)
                     continue
                 else:
                     logger.warning(f"HTTP {response.status_code} on attempt {attempt + 1}")
-                    if attempt < 2:
-                        time.sleep(5 * (attempt + 1))
+                    if attempt < MAX_REQUEST_ATTEMPTS - 1:
+                        time.sleep(self._backoff_delay(attempt))
                         continue
                     response.raise_for_status()
                     
             except Exception as e:
                 logger.error(f"Request failed (attempt {attempt + 1}): {e}")
-                if attempt < 2:
-                    time.sleep(5 * (attempt + 1))
+                if attempt < MAX_REQUEST_ATTEMPTS - 1:
+                    time.sleep(self._backoff_delay(attempt))
                 else:
                     raise
         
+        if rate_limited == MAX_REQUEST_ATTEMPTS:
+            self.rate_limiter.exhaust_today()
+            raise DailyRequestLimitReached(
+                f"Still rate limited after {MAX_REQUEST_ATTEMPTS} attempts, treating the daily quota as used up"
+            )
         raise Exception("All retry attempts failed")
     
-    def _flatten_animal_data(self, animal_data: Dict[str, Any], location: str) -> Dict[str, Any]:
+    def _backoff_delay(self, attempt: int) -> float:
+        """Jittered exponential backoff delay for the given zero-based attempt."""
+        if isinstance(self.rate_limiter, AdaptiveRateLimiter):
+            return self.rate_limiter.backoff_delay(attempt)
+        return random.uniform(0, min(60.0, 2.0 ** attempt))
+    
+    def _fetch_page(self, params: Dict[str, Any], page: int) -> Dict[str, Any]:
         """
-        Flatten nested animal data structure from PetFinder API into a flat dictionary.
+        Fetch a single page of /animals results and return the decoded JSON.
         
-        Extracts and flattens all relevant animal information including breeds, colors,
-        attributes, environment preferences, contact information, and photos into a
-        single-level dictionary suitable for DataFrame creation.
+        Page 1 of a query that plan_windows already read is returned without a request.
+        """
+        if page == 1:
+            probed = self._probed_pages.pop(tuple(sorted(params.items())), None)
+            if probed is not None:
+                return probed
+        response = self._make_request(f"{self.base_url}/animals", dict(params, page=page))
+        return response.json()
+    
+    def _iter_pages(self, params: Dict[str, Any], start_page: int, 
+                    prefetch_window: int = 1) -> Iterator[tuple]:
+        """
+        Yield (page, data) for each page of results, strictly in page order.
+        
+        The first page is fetched on its own to learn `pagination.total_pages`. After that up
+        to `prefetch_window` pages are kept in flight on a small thread pool, and completed
+        pages are handed out in order. If a page fails, its exception is raised when that page
+        is reached, so every page yielded before it is complete and the failing page is the
+        correct resume point. Pages already fetched past it are discarded.
+        
+        Args:
+            params (Dict[str, Any]): Query parameters shared by all pages
+            start_page (int): First page to fetch
+            prefetch_window (int): Maximum number of pages in flight at once
+            
+        Yields:
+            tuple: (page number, decoded JSON response)
+        """
+        data = self._fetch_page(params, start_page)
+        yield start_page, data
+        total_pages = data.get('pagination', {}).get('total_pages', 1)
+        
+        page = start_page + 1
+        if prefetch_window <= 1:
+            while page <= total_pages:
+                data = self._fetch_page(params, page)
+                yield page, data
+                total_pages = data.get('pagination', {}).get('total_pages', total_pages)
+                page += 1
+            return
+        
+        in_flight: Dict[int, Any] = {}
+        next_to_submit = page
+        with ThreadPoolExecutor(max_workers=prefetch_window) as executor:
+            try:
+                while page <= total_pages:
+                    while next_to_submit <= total_pages and len(in_flight) < prefetch_window:
+                        in_flight[next_to_submit] = executor.submit(self._fetch_page, params, next_to_submit)
+                        next_to_submit += 1
+                    
+                    data = in_flight.pop(page).result()
+                    yield page, data
+                    total_pages = data.get('pagination', {}).get('total_pages', total_pages)
+                    page += 1
+            finally:
+                # Stop pages that have not started yet when the caller stops early or a page fails
+                for future in in_flight.values():
+                    future.cancel()
+    
+    def _flatten_page(self, animals: List[Dict[str, Any]], location: str) -> Dict[str, np.ndarray]:
+        """
+        Flatten a page of animal records from the PetFinder API into a typed column batch.
+        
+        Builds each column of ANIMAL_SCHEMA in a single pass over the page instead of creating
+        a dict per animal, so no schema has to be inferred later. The `accessed` timestamp is
+        taken once for the whole page and stored as naive UTC datetime64.
+        
+        Args:
+            animals (List[Dict[str, Any]]): Raw animal records from one API page
+            location (str): State or ZIP code where animals were queried
+            
+        Returns:
+            Dict[str, np.ndarray]: One array per column of ANIMAL_SCHEMA, one entry per animal
+        """
+        # Pre-fetch nested objects once per animal
+        nested = {
+            'animal': animals,
+            'breeds': [animal.get('breeds') or {} for animal in animals],
+            'colors': [animal.get('colors') or {} for animal in animals],
+            'attributes': [animal.get('attributes') or {} for animal in animals],
+            'environment': [animal.get('environment') or {} for animal in animals],
+            'contact': [animal.get('contact') or {} for animal in animals],
+        }
+        nested['address'] = [contact.get('address') or {} for contact in nested['contact']]
+        
+        batch = {column: np.array([record.get(key) for record in nested[source]], dtype=ANIMAL_SCHEMA[column])
+                 for column, (source, key) in _ANIMAL_FIELDS.items()}
+        
+        photos = [animal.get('photos') or [] for animal in animals]
+        batch['photo_count'] = np.array([len(photo_list) for photo_list in photos], dtype='int64')
+        batch['photo'] = np.array([photo_list[0].get('full') if photo_list else None for photo_list in photos],
+                                  dtype=object)
+        batch['primary_photo_cropped'] = np.array(
+            [(animal.get('primary_photo_cropped') or {}).get('full') for animal in animals], dtype=object)
+        batch['tags'] = np.array(['|'.join(animal.get('tags') or []) for animal in animals], dtype=object)
+        
+        n = len(animals)
+        batch['stateQ'] = np.full(n, location, dtype=object)
+        accessed = pd.Timestamp.now('UTC').tz_localize(None).to_datetime64()  # UTC time, once per page
+        batch['accessed'] = np.full(n, accessed, dtype='datetime64[ns]')
+        return batch
+    
+    @staticmethod
+    def _batches_to_frame(batches: List[Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """
+        Concatenate page batches from `_flatten_page` into a DataFrame with ANIMAL_SCHEMA dtypes.
+        
+        Args:
+            batches (List[Dict[str, np.ndarray]]): Column batches, one per page
+            
+        Returns:
+            pd.DataFrame: Animals with the columns of ANIMAL_SCHEMA in order
+        """
+        columns = {column: np.concatenate([batch[column] for batch in batches])
+                   for column in ANIMAL_SCHEMA}
+        columns['accessed'] = pd.to_datetime(columns['accessed'], utc=True)
+        return pd.DataFrame(columns, copy=False)
+    
+    def get_run_file(self, animal_type: str, status: str) -> str:
+        """
+        Get file path for the record of the current collection run.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            str: Full path to the run JSON file, kept across collection dates
+        """
+        return os.path.join(animal_type, f"run_{status}.json")
+    
+    def get_run_id(self, animal_type: str, status: str) -> str:
+        """
+        Get the identity of the run that files are read from and written to.
+        
+        A run is named after the UTC date it started and keeps that name until it completes,
+        so a collection that hits the daily quota resumes in the same directory the next
+        day. The run is the client's `run_id` if given, else the one recorded by the last
+        start_run, else today's date.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            str: Run identity, used as the run's directory name
+        """
+        if self.run_id:
+            return self.run_id
+        key = (animal_type, status)
+        if key not in self._run_ids:
+            run_file = self.get_run_file(animal_type, status)
+            if os.path.exists(run_file):
+                with open(run_file, 'r') as f:
+                    self._run_ids[key] = json.load(f)['run_id']
+            else:
+                return _utc_today()
+        return self._run_ids[key]
+    
+    def start_run(self, animal_type: str, status: str, resume: bool = True) -> str:
+        """
+        Choose the run a collection writes to, and record it for later commands.
+        
+        The current run is kept when resuming, unless every location of it has completed,
+        in which case a new run is started. Without `resume`, the current run is started
+        afresh if it began today, else a new run is started. New runs are named after the
+        current UTC date (see new_run_id).
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            resume (bool): Whether an unfinished run should be continued
+            
+        Returns:
+            str: Identity of the run to collect into
+        """
+        run_id = self.get_run_id(animal_type, status)
+        today = _utc_today()
+        if not self.run_id:
+            progress = self.load_progress(animal_type, status)
+            finished = all(state in progress['completed_states'] for state in US_STATES)
+            if finished or (not resume and not run_id.startswith(today)):
+                run_id = self.new_run_id(animal_type, status)
+            elif not run_id.startswith(today):
+                logger.info(f"Resuming run {run_id} started on an earlier date")
+        
+        run_file = self.get_run_file(animal_type, status)
+        os.makedirs(animal_type, exist_ok=True)
+        tmp_file = f"{run_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'run_id': run_id, 'started_at': datetime.now(timezone.utc).isoformat()}, f, indent=2)
+        os.replace(tmp_file, run_file)
+        self._run_ids[(animal_type, status)] = run_id
+        return run_id
+    
+    def new_run_id(self, animal_type: str, status: str) -> str:
+        """
+        Name for a new run: today's UTC date, suffixed `_02`, `_03`, ... when the status
+        already has a run of that date (e.g. a service sweep repeated within a day).
+        Names sort in the order the runs started.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            str: Unused run identity
+        """
+        today = _utc_today()
+        run_id, number = today, 1
+        while (os.path.isdir(os.path.join(animal_type, run_id, status))
+               or os.path.exists(os.path.join(animal_type, run_id, f"progress_{status}.json"))):
+            number += 1
+            run_id = f"{today}_{number:02d}"
+        return run_id
+    
+    def create_directory_structure(self, animal_type: str, status: str) -> str:
+        """
+        Create hierarchical directory structure for organizing data files.
+        
+        Creates directory structure in format: animal_type/run_id/status/, where the
+        run id is the start date of the run (see get_run_id).
+        If directories already exist, no error is raised.
+        
+        Args:
+            animal_type (str): Type of animal (e.g., 'cat', 'dog')
+            status (str): Animal status (e.g., 'adoptable', 'adopted')
+            
+        Returns:
+            str: Path to created directory
+        """
+        directory = os.path.join(animal_type, self.get_run_id(animal_type, status), status)
+        os.makedirs(directory, exist_ok=True)
+        return directory
+    
+    def get_progress_file(self, animal_type: str, status: str) -> str:
+        """
+        Get file path for progress tracking JSON file.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            str: Full path to progress tracking file
+        """
+        return os.path.join(animal_type, self.get_run_id(animal_type, status), f"progress_{status}.json")
+    
+    def get_seen_ids_file(self, animal_type: str, status: str) -> str:
+        """
+        Get file path for the log of animal ids already collected in this run.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            str: Full path to the seen-id log
+        """
+        return os.path.join(animal_type, self.get_run_id(animal_type, status), f"seen_ids_{status}.bin")
+    
+    def get_watermark_file(self, animal_type: str, status: str) -> str:
+        """
+        Get file path for the per-location watermarks, kept across collection dates.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            str: Full path to the watermark JSON file
+        """
+        return os.path.join(animal_type, f"watermarks_{status}.json")
+    
+    def load_watermarks(self, animal_type: str, status: str) -> Dict[str, str]:
+        """
+        Load the newest `published_at` collected for each location.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            Dict[str, str]: ISO timestamp per location, empty if no run has completed yet
+        """
+        watermark_file = self.get_watermark_file(animal_type, status)
+        if os.path.exists(watermark_file):
+            with open(watermark_file, 'r') as f:
+                return json.load(f)
+        return {}
+    
+    def save_watermarks(self, animal_type: str, status: str, watermarks: Dict[str, str]) -> None:
+        """
+        Atomically save the per-location watermarks.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            watermarks (Dict[str, str]): ISO timestamp per location
+        """
+        watermark_file = self.get_watermark_file(animal_type, status)
+        os.makedirs(os.path.dirname(watermark_file), exist_ok=True)
+        tmp_file = f"{watermark_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, watermark_file)
+    
+    def get_journal_file(self, animal_type: str, status: str) -> str:
+        """
+        Get file path for the append-only journal of page checkpoints.
         
         Args:
-            animal_data (Dict[str, Any]): Raw animal data from PetFinder API
-            location (str): State or ZIP code where animal was queried
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
             
         Returns:
-            Dict[str, Any]: Flattened animal data with all nested fields extracted
-        """
-        
-        # Pre-fetch nested objects once to avoid repeated lookups
-        breeds = animal_data.get('breeds', {})
-        colors = animal_data.get('colors', {})
-        attributes = animal_data.get('attributes', {})
-        environment = animal_data.get('environment', {})
-        contact = animal_data.get('contact', {})
-        address = contact.get('address', {})
-        photos = animal_data.get('photos', [])
-        tags = animal_data.get('tags', [])
-        primary_photo = animal_data.get('primary_photo_cropped', {})
-        
-        # Build flattened dict in one operation
-        flattened = {
-            # Basic info
-            'id': animal_data.get('id', None),
-            'org_id': animal_data.get('organization_id', None),
-            'url': animal_data.get('url', None),
-            'type': animal_data.get('type', None),
-            'species': animal_data.get('species', None),
-            'age': animal_data.get('age', None),
-            'gender': animal_data.get('gender', None),
-            'size': animal_data.get('size', None),
-            'coat': animal_data.get('coat', None),
-            'name': animal_data.get('name', None),
-            'description': animal_data.get('description', None),
-            'status': animal_data.get('status', None),
-            'status_changed_at': animal_data.get('status_changed_at', None),
-            'published_at': animal_data.get('published_at', None),
-            'distance': animal_data.get('distance', None),
-            
-            # Breeds
-            'breeds_primary': breeds.get('primary', None),
-            'breeds_secondary': breeds.get('secondary', None),
-            'breeds_mixed': breeds.get('mixed', None),
-            'breeds_unknown': breeds.get('unknown', None),
-            
-            # Colors
-            'colors_primary': colors.get('primary', None),
-            'colors_secondary': colors.get('secondary', None),
-            'colors_tertiary': colors.get('tertiary', None),
-            
-            # Attributes
-            'spayed_neutered': attributes.get('spayed_neutered', None),
-            'house_trained': attributes.get('house_trained', None),
-            'declawed': attributes.get('declawed', None),
-            'special_needs': attributes.get('special_needs', None),
-            'shots_current': attributes.get('shots_current', None),
-            
-            # Environment
-            'env_children': environment.get('children', None),
-            'env_dogs': environment.get('dogs', None),
-            'env_cats': environment.get('cats', None),
-            
-            # Contact
-            'contact_email': contact.get('email', None),
-            'contact_phone': contact.get('phone', None),
-            'contact_address1': address.get('address1', None),
-            'contact_address2': address.get('address2', None),
-            'contact_city': address.get('city', None),
-            'contact_state': address.get('state', None),
-            'contact_postcode': address.get('postcode', None),
-            'contact_country': address.get('country', None),
-            
-            # Photos
-            'photo_count': len(photos),
-            'photo': photos[0].get('full') if photos else None,
-            'primary_photo_cropped': primary_photo.get('full') if primary_photo else None,
-            
-            # Tags
-            'tags': '|'.join(tags) if tags else '',
-            
-            # Metadata
-            'stateQ': location,
-            'accessed': pd.Timestamp.now('UTC')  # UTC time
+            str: Full path to the progress journal, next to the progress file
+        """
+        return os.path.splitext(self.get_progress_file(animal_type, status))[0] + ".journal"
+    
+    def load_progress(self, animal_type: str, status: str) -> Dict[str, Any]:
+        """
+        Load collection progress from previous session.
+        
+        Reads progress tracking file to determine which states have been completed,
+        which failed, and which were partially completed, then replays the page
+        checkpoints journaled since the file was last compacted. A journal line torn
+        by a crash is cut off, so new checkpoints are appended after the last good one.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            Dict[str, Any]: Progress information containing:
+                - completed_states: List of fully completed states
+                - failed_states: List of states that failed collection
+                - partial_states: Dict of partially completed states with page info
+                - session_start_time: ISO timestamp of session start
+                - journal_seq: Sequence number of the last checkpoint applied
+        """
+        progress_file = self.get_progress_file(animal_type, status)
+        if os.path.exists(progress_file):
+            with open(progress_file, 'r') as f:
+                progress = json.load(f)
+        else:
+            progress = {
+                'completed_states': [], 
+                'failed_states': [],
+                'partial_states': {},
+                'session_start_time': datetime.now().isoformat()
+            }
+        
+        journal_file = self.get_journal_file(animal_type, status)
+        if not os.path.exists(journal_file):
+            return progress
+        
+        replayed = 0
+        good_bytes = 0
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                good_bytes += len(line)
+                # Entries at or below journal_seq were already compacted into the progress file
+                if entry['seq'] <= progress.get('journal_seq', 0):
+                    continue
+                self._apply_checkpoint(progress, entry)
+                replayed += 1
+        
+        if good_bytes < os.path.getsize(journal_file):
+            logger.warning(f"Discarding torn checkpoint at the end of {journal_file}")
+            with open(journal_file, 'r+b') as f:
+                f.truncate(good_bytes)
+                os.fsync(f.fileno())
+        if replayed:
+            logger.info(f"Replayed {replayed} page checkpoints from {journal_file}")
+        return progress
+    
+    @staticmethod
+    def _apply_checkpoint(progress: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        """
+        Apply a journaled page checkpoint to the in-memory progress.
+        
+        Args:
+            progress (Dict[str, Any]): Progress data to update
+            entry (Dict[str, Any]): Checkpoint with seq, state, last_page, animals_collected,
+                after, committed_size and optionally seen_ids_count
+        """
+        progress['partial_states'][entry['state']] = {
+            'last_page': entry['last_page'],
+            'animals_collected': entry['animals_collected'],
+            'after': entry['after'],
+            'committed_size': entry['committed_size']
         }
+        if entry.get('seen_ids_count') is not None:
+            progress['seen_ids_count'] = entry['seen_ids_count']
+        progress['journal_seq'] = entry['seq']
+    
+    def journal_checkpoint(self, animal_type: str, status: str, progress: Dict[str, Any],
+                           entry: Dict[str, Any]) -> None:
+        """
+        Record a page checkpoint by appending it to the progress journal.
+        
+        Page checkpoints are frequent, so instead of rewriting the whole progress file each
+        one is applied in memory and appended as a single fsync'd JSON line. Once the journal
+        grows past JOURNAL_COMPACT_BYTES it is compacted into the progress file.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            progress (Dict[str, Any]): Progress data, updated in place
+            entry (Dict[str, Any]): Checkpoint fields (see _apply_checkpoint) without seq
+        """
+        entry = {'seq': progress.get('journal_seq', 0) + 1, **entry}
+        self._apply_checkpoint(progress, entry)
+        journal_file = self.get_journal_file(animal_type, status)
+        with open(journal_file, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+            journal_size = f.tell()
+        if journal_size >= JOURNAL_COMPACT_BYTES:
+            self.save_progress(animal_type, status, progress)
+    
+    def save_progress(self, animal_type: str, status: str, progress: Dict[str, Any]) -> None:
+        """
+        Save collection progress for resuming later.
+        
+        Persists current progress state to JSON file for resumption capability
+        when hitting API rate limits or encountering errors. The file is replaced
+        atomically, so a crash mid-save leaves the previous checkpoint intact.
         
-        return flattened
+        This also compacts the progress journal: the saved file records the last journal
+        sequence number it includes, after which the journal is emptied. A crash between
+        the two steps only leaves entries that the next load skips.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected  
+            progress (Dict[str, Any]): Progress data to save
+        """
+        progress_file = self.get_progress_file(animal_type, status)
+        tmp_file = f"{progress_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(progress, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, progress_file)
+        
+        journal_file = self.get_journal_file(animal_type, status)
+        if os.path.exists(journal_file) and os.path.getsize(journal_file):
+            with open(journal_file, 'r+b') as f:
+                f.truncate(0)
+                os.fsync(f.fileno())
+    
+    def _query_params(self, animal_type: str, status: str, location: str,
+                      after_date: Optional[str] = None, before_date: Optional[str] = None) -> Dict[str, Any]:
+        """Query parameters of a location's /animals pages, without the page number."""
+        params = {
+            'type': animal_type,
+            'status': status,
+            'location': location,
+            'limit': 100,
+            'sort': 'recent'
+        }
+        
+        # Add the after parameter if specified
+        if after_date:
+            params['after'] = after_date
+        if before_date:
+            params['before'] = before_date
+        return params
+    
+    @staticmethod
+    def _resume_point(progress: Dict[str, Any], watermarks: Dict[str, str], state: str,
+                      after_date: Optional[str], delta: bool) -> tuple:
+        """
+        Page and `after` filter a location's collection starts from.
+        
+        A partially collected location resumes with the query it started with, or the page
+        numbers would not line up. In a delta run, other locations with a watermark are
+        only queried for animals published after it.
+        
+        Returns:
+            tuple: (start page, `after` filter or None)
+        """
+        partial = progress['partial_states'].get(state)
+        if partial:
+            return partial['last_page'], partial.get('after', after_date)
+        if delta and state in watermarks:
+            return 1, _later_timestamp(after_date, watermarks[state])
+        return 1, after_date
     
-    def create_directory_structure(self, animal_type: str, status: str) -> str:
+    def plan_windows(self, animal_type: str, status: str, location: str, after_date: Optional[str],
+                     target_pages: int, total_pages: Optional[int] = None) -> List[Dict[str, Optional[str]]]:
         """
-        Create hierarchical directory structure for organizing data files.
+        Split a large location into published-date windows of about `target_pages` pages.
         
-        Creates directory structure in format: animal_type/YYYY-MM-DD/status/
-        If directories already exist, no error is raised.
+        Results are sorted newest first, so the first animal on page `k * target_pages + 1`
+        is the newest of window k. Reading it for every k gives the window boundaries at
+        one request per window (plus one for page 1 when `total_pages` is unknown). When
+        page 1 shows the location fits in one window, it is kept and served as the first
+        page of the location's collection, so locations left whole cost no extra request. Each
+        window is widened by a second on both sides so listings published on a boundary
+        are not lost; the duplicates this creates are removed by id. Only the newest window
+        is open-ended, so listings published while the location is collected shift the
+        pages of that window alone.
         
         Args:
-            animal_type (str): Type of animal (e.g., 'cat', 'dog')
-            status (str): Animal status (e.g., 'adoptable', 'adopted')
+            animal_type (str): Type of animal to collect
+            status (str): Status of animals to collect
+            location (str): State abbreviation or ZIP code
+            after_date (Optional[str]): Lower bound of the oldest window
+            target_pages (int): Pages per window
+            total_pages (Optional[int]): Pages of the location, probed when not given
             
         Returns:
-            str: Path to created directory
+            List[Dict[str, Optional[str]]]: `after` and `before` of each window, newest first,
+                empty if the location fits in one window
         """
-        date_str = date.today().isoformat()
-        directory = os.path.join(animal_type, date_str, status)
-        os.makedirs(directory, exist_ok=True)
-        return directory
+        params = self._query_params(animal_type, status, location, after_date)
+        if total_pages is None:
+            first_page = self._fetch_page(params, 1)
+            total_pages = first_page.get('pagination', {}).get('total_pages', 1)
+            if total_pages <= target_pages:
+                self._probed_pages[tuple(sorted(params.items()))] = first_page
+        if total_pages <= target_pages:
+            return []
+        
+        bounds: List[pd.Timestamp] = []
+        for page in range(target_pages + 1, total_pages + 1, target_pages):
+            animals = self._fetch_page(params, page).get('animals', [])
+            newest = pd.to_datetime(animals[0].get('published_at'), utc=True, errors='coerce') if animals else pd.NaT
+            # Skip boundaries that would make an empty window
+            if pd.notna(newest) and (not bounds or newest < bounds[-1]):
+                bounds.append(newest)
+        if not bounds:
+            return []
+        
+        margin = pd.Timedelta(seconds=1)
+        windows = []
+        for index, newest in enumerate([None] + bounds):
+            older = bounds[index] if index < len(bounds) else None
+            windows.append({
+                'after': (older - margin).isoformat() if older is not None else after_date,
+                'before': (newest + margin).isoformat() if newest is not None else None
+            })
+        logger.info(f"Split {location} ({total_pages} pages) into {len(windows)} published-date windows")
+        return windows
     
-    def get_progress_file(self, animal_type: str, status: str) -> str:
+    def get_plan_file(self, animal_type: str, status: str) -> str:
         """
-        Get file path for progress tracking JSON file.
+        Get file path for the request plan of the current run.
         
         Args:
             animal_type (str): Type of animal being collected
             status (str): Status of animals being collected
             
         Returns:
-            str: Full path to progress tracking file
+            str: Full path to the plan JSON file
         """
-        date_str = date.today().isoformat()
-        return os.path.join(animal_type, date_str, f"progress_{status}.json")
+        return os.path.join(animal_type, self.get_run_id(animal_type, status), f"plan_{status}.json")
     
-    def load_progress(self, animal_type: str, status: str) -> Dict[str, Any]:
+    def plan_budget(self, animal_type: str, status: str, after_date: Optional[str] = None,
+                    delta: bool = False, daily_budget: Optional[int] = None,
+                    refresh: bool = False) -> Dict[str, Any]:
         """
-        Load collection progress from previous session.
+        Estimate the requests a collection still needs and schedule them over days.
         
-        Reads progress tracking file to determine which states have been completed,
-        which failed, and which were partially completed.
+        Probes page 1 of every location not yet completed in the current run, with the
+        query its collection would use, and records `pagination.total_count` and
+        `total_pages`. Each probe costs one request. Probes are saved in the run's plan
+        file and reused until the query changes or `refresh` is set. If the daily limit
+        is reached while probing, the remaining locations are estimated from the average
+        of the probed ones.
+        
+        The requests left per location (pages not yet collected) are packed into days with
+        schedule_pages, with today's remaining budget as the first day. collect_all_states
+        then processes locations in the plan's order, and with several workers only starts
+        a location while today's budget also covers the locations in progress, so each day
+        fills its budget and stops on at most one split location.
         
         Args:
-            animal_type (str): Type of animal being collected
-            status (str): Status of animals being collected
+            animal_type (str): Type of animal to collect
+            status (str): Status of animals to collect
+            after_date (Optional[str]): Filter animals published after this date
+            delta (bool): Whether the collection will run in delta mode
+            daily_budget (Optional[int]): Requests per day, defaults to the limiter's daily limit
+            refresh (bool): Whether to probe again locations probed before
             
         Returns:
-            Dict[str, Any]: Progress information containing:
-                - completed_states: List of fully completed states
-                - failed_states: List of states that failed collection
-                - partial_states: Dict of partially completed states with page info
-                - session_start_time: ISO timestamp of session start
-        """
-        progress_file = self.get_progress_file(animal_type, status)
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r') as f:
-                return json.load(f)
-        return {
-            'completed_states': [], 
-            'failed_states': [],
-            'partial_states': {},
-            'session_start_time': datetime.now().isoformat()
-        }
-    
-    def save_progress(self, animal_type: str, status: str, progress: Dict[str, Any]) -> None:
+            Dict[str, Any]: Plan containing:
+                - locations: total_count, total_pages, start_page, requests, after and
+                  estimated (not probed) per location
+                - total_requests: Requests still needed
+                - days: Schedule per day, entries with location, first_page and last_page
+                
+        Raises:
+            ValueError: If `delta` is set for a status not in DELTA_STATUSES
         """
-        Save collection progress for resuming later.
+        if delta:
+            _check_delta_status(status)
+        self.start_run(animal_type, status, resume=True)
+        self.create_directory_structure(animal_type, status)
+        progress = self.load_progress(animal_type, status)
+        watermarks = self.load_watermarks(animal_type, status)
+        plan_file = self.get_plan_file(animal_type, status)
         
-        Persists current progress state to JSON file for resumption capability
-        when hitting API rate limits or encountering errors.
+        probes: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(plan_file) and not refresh:
+            with open(plan_file, 'r') as f:
+                probes = {location: info for location, info in json.load(f)['locations'].items()
+                          if not info.get('estimated')}
         
-        Args:
-            animal_type (str): Type of animal being collected
-            status (str): Status of animals being collected  
-            progress (Dict[str, Any]): Progress data to save
-        """
-        progress_file = self.get_progress_file(animal_type, status)
-        with open(progress_file, 'w') as f:
-            json.dump(progress, f, indent=2)
+        locations: Dict[str, Dict[str, Any]] = {}
+        unprobed = []
+        for state in US_STATES:
+            if state in progress['completed_states']:
+                continue
+            start_page, state_after = self._resume_point(progress, watermarks, state, after_date, delta)
+            probe = probes.get(state)
+            if probe is None or probe['after'] != state_after:
+                if unprobed:
+                    unprobed.append(state)
+                    continue
+                try:
+                    data = self._fetch_page(self._query_params(animal_type, status, state, state_after), 1)
+                except DailyRequestLimitReached as e:
+                    logger.warning(f"Stopped probing at {state}: {e}")
+                    unprobed.append(state)
+                    continue
+                pagination = data.get('pagination', {})
+                probe = {
+                    'after': state_after,
+                    'total_count': pagination.get('total_count', len(data.get('animals', []))),
+                    'total_pages': pagination.get('total_pages', 1)
+                }
+            locations[state] = dict(probe, start_page=start_page, estimated=False)
+        
+        # Locations that could not be probed are assumed to be of average size
+        known_pages = [info['total_pages'] for info in locations.values()]
+        average_pages = round(np.mean(known_pages)) if known_pages else 1
+        for state in unprobed:
+            start_page, state_after = self._resume_point(progress, watermarks, state, after_date, delta)
+            locations[state] = {'after': state_after, 'total_count': None, 'total_pages': average_pages,
+                                'start_page': start_page, 'estimated': True}
+        
+        # Even an empty location costs the request that finds it empty
+        for info in locations.values():
+            info['requests'] = max(1, info['total_pages'] - info['start_page'] + 1)
+        
+        daily_budget = daily_budget or self.rate_limiter.daily_limit
+        days = schedule_pages({state: info['requests'] for state, info in locations.items()},
+                              daily_budget, min(daily_budget, self.rate_limiter.remaining_today))
+        
+        # Turn request counts into page ranges, in each location's page order
+        next_page = {state: info['start_page'] for state, info in locations.items()}
+        schedule = []
+        for day in days:
+            entries = []
+            for entry in day:
+                first_page = next_page[entry['location']]
+                next_page[entry['location']] += entry['requests']
+                entries.append({'location': entry['location'], 'first_page': first_page,
+                                'last_page': first_page + entry['requests'] - 1})
+            schedule.append(entries)
+        
+        plan = {
+            'created_at': datetime.now().isoformat(),
+            'daily_budget': daily_budget,
+            'total_requests': sum(info['requests'] for info in locations.values()),
+            'locations': locations,
+            'days': schedule
+        }
+        tmp_file = f"{plan_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(plan, f, indent=2)
+        os.replace(tmp_file, plan_file)
+        
+        logger.info(f"Plan for {status} {animal_type}s: {plan['total_requests']} requests over "
+                    f"{len(schedule)} days of {daily_budget} ({len(unprobed)} locations estimated)")
+        days_per_location = Counter(entry['location'] for entries in schedule for entry in entries)
+        for number, entries in enumerate(schedule, start=1):
+            requests_used = sum(entry['last_page'] - entry['first_page'] + 1 for entry in entries)
+            splits = [entry['location'] for entry in entries if days_per_location[entry['location']] > 1]
+            logger.info(f"  Day {number}: {requests_used} requests, {len(entries)} locations"
+                        + (f" (split: {', '.join(splits)})" if splits else ""))
+        return plan
+    
+    def _load_plan(self, animal_type: str, status: str) -> Optional[Dict[str, Any]]:
+        """The run's plan (see plan_budget), None if no plan was made."""
+        plan_file = self.get_plan_file(animal_type, status)
+        if not os.path.exists(plan_file):
+            return None
+        with open(plan_file, 'r') as f:
+            return json.load(f)
+    
+    def _planned_order(self, animal_type: str, status: str) -> List[str]:
+        """Locations in the order of the run's plan, empty if no plan was made."""
+        plan = self._load_plan(animal_type, status)
+        if plan is None:
+            return []
+        return list(dict.fromkeys(entry['location'] for entries in plan['days'] for entry in entries))
     
     def collect_state_data(self, animal_type: str, status: str, location: str, 
-                          after_date: Optional[str] = None, start_page: int = 1) -> Dict[str, Any]:
+                          after_date: Optional[str] = None, start_page: int = 1,
+                          before_date: Optional[str] = None, window: Optional[int] = None,
+                          prefetch_window: int = PAGE_PREFETCH_WINDOW, flush_every: int = FLUSH_EVERY_PAGES,
+                          on_checkpoint: Optional[Callable[[int, int, List[int], Optional[int]], None]] = None,
+                          seen_ids: Optional[SeenIdIndex] = None,
+                          committed_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Collect animal data for a single state with resumption capability.
         
@@ -374,162 +1729,339 @@ class StateBasedPetfinderClient:
         handling pagination and saving data incrementally. Supports resumption
         from a specific page if collection was previously interrupted.
         
+        Animals are streamed to the CSV every `flush_every` pages rather than held for the
+        whole state, so memory stays bounded by the flush batch. Each flush is fsync'd and
+        then reported through `on_checkpoint(next_page, total_animals, new_ids, committed_size)`,
+        which lets the caller persist a resume point that never runs ahead of the data on disk.
+        
+        Data can also run ahead of the resume point, when a crash lands between a flush and
+        its checkpoint. On resume, rows past the checkpoint are therefore discarded first: a
+        CSV is truncated to the `committed_size` recorded with the checkpoint and Parquet
+        parts from `start_page` onwards are removed, so the refetched pages are not duplicated.
+        
+        When a `seen_ids` index is given, animals it already holds (collected from this or an
+        overlapping location) are skipped before flattening and writing. The ids written in
+        each flush are passed to `on_checkpoint` so the caller can commit them to the index
+        with the checkpoint.
+        
+        With `window`, only animals published between `after_date` and `before_date` are
+        collected, into a file of their own (see plan_windows).
+        
+        Once the first page reveals the total page count, up to `prefetch_window` pages are
+        fetched ahead under the shared rate limiter and processed in page order, so the
+        resume point recorded on failure is always the first page that was not processed.
+        
         Args:
             animal_type (str): Type of animal to collect (e.g., 'cat', 'dog')
             status (str): Status of animals (e.g., 'adoptable', 'adopted')
             location (str): State abbreviation or ZIP code for Nevada
             after_date (Optional[str]): ISO datetime string for filtering by publish date
             start_page (int): Page number to start collection from (for resumption)
+            before_date (Optional[str]): ISO datetime string, only animals published before it
+            window (Optional[int]): Index of the published-date window being collected
+            prefetch_window (int): Number of pages kept in flight at once (1 fetches sequentially)
+            flush_every (int): Number of pages buffered before they are written to disk
+            on_checkpoint (Optional[Callable[[int, int, List[int], Optional[int]], None]]): Called
+                after each flush with the next page to collect, the total number of animals saved
+                so far, the ids written by the flush and the committed CSV size in bytes (None
+                for Parquet)
+            seen_ids (Optional[SeenIdIndex]): Ids already collected, which are skipped
+            committed_size (Optional[int]): CSV size recorded with the checkpoint being resumed
             
         Returns:
             Dict[str, Any]: Collection results containing:
                 - completed: Boolean indicating if collection finished
                 - last_page: Last page number processed
                 - animals_collected_this_session: Count of animals collected this session
+                - animals_fetched_this_session: Count of animals returned by the API this session
+                - duplicates_skipped: Animals skipped because they were already collected
+                - newest_published_at: Newest `published_at` fetched, ISO string (when completed)
                 - total_animals: Total count including existing animals
                 - error: Error message if collection failed (optional)
                 
         Raises:
             Exception: For API request failures after all retries exhausted
         """
-        logger.info(f"Collecting {status} {animal_type}s from {location} (published after {after_date or 'all time'}) starting from page {start_page}")
+        logger.info(f"Collecting {status} {animal_type}s from {location} (published after {after_date or 'all time'}"
+                    f"{f' and before {before_date}' if before_date else ''}) starting from page {start_page}")
         
         directory = self.create_directory_structure(animal_type, status)
-        filename = os.path.join(directory, f"{location}_{animal_type}s.csv")
-        
-        params = {
-            'type': animal_type,
-            'status': status,
-            'location': location,
-            'limit': 100,
-            'page': start_page,
-            'sort': 'recent'
-        }
+        unit = location if window is None else _window_unit(location, window)
+        filename = os.path.join(directory, f"{unit}_{animal_type}s.{self.output_format}")
         
-        # Add the after parameter if specified
-        if after_date:
-            params['after'] = after_date
+        params = self._query_params(animal_type, status, location, after_date, before_date)
         
-        all_animals = []
         total_existing_animals = 0
+        newest_published: Optional[pd.Timestamp] = None
+        
+        if start_page > 1 and os.path.exists(filename):
+            self._discard_uncommitted(filename, start_page, committed_size)
         
-        # Count existing animals if resuming
+        # Count existing animals if resuming, and find the newest already saved (sort='recent'
+        # puts it on the pages collected before), loading only the columns needed
         if start_page > 1 and os.path.exists(filename):
             try:
-                existing_df = pd.read_csv(filename)
+                existing_df = read_animal_file(filename, columns=['id', 'published_at'])
                 total_existing_animals = len(existing_df)
+                existing_newest = pd.to_datetime(existing_df['published_at'], utc=True, errors='coerce').max()
+                if pd.notna(existing_newest):
+                    newest_published = existing_newest
                 logger.info(f"Resuming: {total_existing_animals} existing animals in {filename}")
             except Exception as e:
                 logger.warning(f"Could not read existing data: {e}")
         
-        page = start_page
+        # A fresh collection overwrites the file, a resumed one appends to it
+        write_header = start_page == 1 or not os.path.exists(filename)
+        buffered_pages: List[Dict[str, np.ndarray]] = []
+        buffered_ids: List[int] = []  # ids of the buffered animals, committed with the checkpoint
+        buffered_id_set = set()
+        pages_since_flush = 0
+        buffer_start_page = start_page
+        
+        page = start_page  # first page not yet written, i.e. the resume point
+        last_page = start_page
         animals_collected_this_session = 0
+        animals_fetched_this_session = 0
         
-        while True:
-            params['page'] = page
-            
-            try:
-                response = self._make_request(f"{self.base_url}/animals", params)
-                data = response.json()
+        def flush() -> None:
+            nonlocal write_header, buffer_start_page, pages_since_flush, committed_size
+            if buffered_pages:
+                committed_size = self._write_rows(filename, self._batches_to_frame(buffered_pages),
+                                                  write_header, buffer_start_page)
+                write_header = False
+                buffered_pages.clear()
+            buffer_start_page = page
+            pages_since_flush = 0
+            if on_checkpoint is not None:
+                on_checkpoint(page, total_existing_animals + animals_collected_this_session,
+                              list(buffered_ids), committed_size)
+            buffered_ids.clear()
+            buffered_id_set.clear()
+        
+        pages = self._iter_pages(params, start_page, prefetch_window)
+        
+        try:
+            for last_page, data in pages:
                 animals = data.get('animals', [])
                 
                 if not animals:
-                    logger.info(f"No more animals found for {location} on page {page}")
+                    logger.info(f"No more animals found for {unit} on page {last_page}")
                     break
+
+                # Records without an id cannot be typed, deduplicated or resumed, skip them
+                missing_ids = sum(animal.get('id') is None for animal in animals)
+                if missing_ids:
+                    logger.warning(f"{unit} - Page {last_page} - Skipped {missing_ids} animals without an id")
+                    animals = [animal for animal in animals if animal.get('id') is not None]
+
+                animals_fetched_this_session += len(animals)
+                
+                # Track the newest listing seen, the watermark for the next delta run
+                page_newest = pd.to_datetime(pd.Series([animal.get('published_at') for animal in animals]),
+                                             utc=True, errors='coerce').max()
+                if pd.notna(page_newest) and (newest_published is None or page_newest > newest_published):
+                    newest_published = page_newest
                 
-                # Process and flatten animals
-                page_animals = []
-                for animal in animals:
-                    flattened = self._flatten_animal_data(animal, location)
-                    page_animals.append(flattened)
+                # Skip animals already collected here or by an overlapping location
+                if seen_ids is not None:
+                    ids = [animal.get('id') for animal in animals]
+                    already_seen = seen_ids.contains(np.array(ids, dtype='int64'))
+                    new_animals = []
+                    for animal, animal_id, seen in zip(animals, ids, already_seen):
+                        if not seen and animal_id not in buffered_id_set:
+                            buffered_id_set.add(animal_id)
+                            buffered_ids.append(animal_id)
+                            new_animals.append(animal)
+                    animals = new_animals
                 
-                all_animals.extend(page_animals)
-                animals_collected_this_session += len(page_animals)
+                # Flatten the whole page into a typed column batch
+                if animals:
+                    buffered_pages.append(self._flatten_page(animals, location))
+                animals_collected_this_session += len(animals)
                 
                 pagination = data.get('pagination', {})
                 total_pages = pagination.get('total_pages', 1)
                 
-                logger.info(f"{location} - Page {page}/{total_pages} - "
-                        f"Collected {len(page_animals)} animals this page, "
-                        f"{total_existing_animals + len(all_animals)} total")
+                logger.info(f"{unit} - Page {last_page}/{total_pages} - "
+                        f"Collected {len(animals)} animals this page, "
+                        f"{total_existing_animals + animals_collected_this_session} total")
                 
-                if page >= total_pages:
-                    break
-                    
-                page += 1
-                
-            except Exception as e:
-                # Save whatever data we have collected so far before failing
-                logger.warning(f"Request failed on page {page}: {e}")
-                logger.info(f"Saving {len(all_animals)} animals collected before failure")
-                
-                if all_animals:
-                    df = pd.DataFrame(all_animals)
-                    
-                    # Determine write mode
-                    if start_page == 1 or not os.path.exists(filename):
-                        # New file - write with header
-                        df.to_csv(filename, index=False)
-                        logger.info(f"Saved {len(df)} animals to new file {filename}")
-                    else:
-                        # Append to existing file - no header
-                        df.to_csv(filename, mode='a', header=False, index=False)
-                        logger.info(f"Appended {len(df)} animals to {filename}")
+                page = last_page + 1
+                pages_since_flush += 1
+                if pages_since_flush >= flush_every:
+                    flush()
                 
-                # Return partial completion status
-                return {
-                    'completed': False,
-                    'last_page': page,
-                    'animals_collected_this_session': animals_collected_this_session,
-                    'total_animals': total_existing_animals + len(all_animals),
-                    'error': str(e)
-                }
-        
-        # Save data using append mode
-        if all_animals:
-            df = pd.DataFrame(all_animals)
+        except Exception as e:
+            # Save whatever data we have collected so far before failing
+            logger.warning(f"Request failed on page {page}: {e}")
+            logger.info(f"Saving {sum(len(batch['id']) for batch in buffered_pages)} buffered animals "
+                        f"collected before failure")
+            flush()
             
-            # Determine write mode
-            if start_page == 1 or not os.path.exists(filename):
-                # New file - write with header
-                df.to_csv(filename, index=False)
-                logger.info(f"Saved {len(df)} animals to new file {filename}")
-            else:
-                # Append to existing file - no header
-                df.to_csv(filename, mode='a', header=False, index=False)
-                logger.info(f"Appended {len(df)} animals to {filename}")
+            # Return partial completion status
+            return {
+                'completed': False,
+                'last_page': page,
+                'animals_collected_this_session': animals_collected_this_session,
+                'animals_fetched_this_session': animals_fetched_this_session,
+                'duplicates_skipped': animals_fetched_this_session - animals_collected_this_session,
+                'total_animals': total_existing_animals + animals_collected_this_session,
+                'error': str(e)
+            }
+        finally:
+            # Stop any prefetched pages that are no longer needed
+            pages.close()
+        
+        flush()
+        if animals_collected_this_session:
+            logger.info(f"Saved {animals_collected_this_session} animals to {filename}")
         else:
-            logger.info(f"No animals collected for {location}")
+            logger.info(f"No animals collected for {unit}")
         
         return {
             'completed': True,
-            'last_page': page,
+            'last_page': last_page,
             'animals_collected_this_session': animals_collected_this_session,
-            'total_animals': total_existing_animals + len(all_animals)
+            'animals_fetched_this_session': animals_fetched_this_session,
+            'duplicates_skipped': animals_fetched_this_session - animals_collected_this_session,
+            'total_animals': total_existing_animals + animals_collected_this_session,
+            'newest_published_at': newest_published.isoformat() if newest_published is not None else None
         }
     
+    def _write_rows(self, filename: str, df: pd.DataFrame, write_header: bool, first_page: int) -> Optional[int]:
+        """
+        Durably write flattened animals to a state file.
+        
+        The rows are written, flushed and fsync'd before returning, so a checkpoint
+        recorded afterwards never points past data that is not on disk.
+        
+        CSV files are appended to. Parquet cannot be appended to, so a Parquet state file is
+        a directory holding one part file per flush, named after the batch's first page. A
+        batch rewritten after a crash therefore replaces its earlier part instead of
+        duplicating it.
+        
+        Args:
+            filename (str): State file (CSV) or directory (Parquet) to write to
+            df (pd.DataFrame): Flattened animal records
+            write_header (bool): Whether this starts a fresh file, replacing any existing one
+            first_page (int): First page contained in `df`
+            
+        Returns:
+            Optional[int]: Size of the CSV file after the write, None for Parquet
+        """
+        if self.output_format == 'csv':
+            with open(filename, 'w' if write_header else 'a', newline='') as f:
+                df.to_csv(f, header=write_header, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+                return f.tell()
+        
+        if write_header and os.path.exists(filename):
+            shutil.rmtree(filename)
+        os.makedirs(filename, exist_ok=True)
+        part_name = f"part-{first_page:05d}.parquet"
+        part_file = os.path.join(filename, part_name)
+        tmp_file = os.path.join(filename, f".{part_name}.tmp")  # dot files are skipped by readers
+        write_parquet(df, tmp_file)
+        with open(tmp_file, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_file, part_file)
+        return None
+    
+    def _discard_uncommitted(self, filename: str, start_page: int, committed_size: Optional[int]) -> None:
+        """
+        Remove rows written after the checkpoint a state is resumed from.
+        
+        Args:
+            filename (str): State file (CSV) or directory (Parquet)
+            start_page (int): Page the state is resumed from
+            committed_size (Optional[int]): CSV size recorded with the checkpoint, None when
+                the checkpoint predates the journal (the CSV is then left as is)
+        """
+        if self.output_format == 'csv':
+            if committed_size is not None and os.path.getsize(filename) > committed_size:
+                logger.info(f"Discarding {os.path.getsize(filename) - committed_size} uncommitted bytes "
+                            f"from {filename}")
+                with open(filename, 'r+b') as f:
+                    f.truncate(committed_size)
+                    os.fsync(f.fileno())
+            return
+        
+        for part_name in os.listdir(filename):
+            match = re.fullmatch(r'\.?part-(\d+)\.parquet(\.tmp)?', part_name)
+            if match and (match.group(2) or int(match.group(1)) >= start_page):
+                logger.info(f"Discarding uncommitted part {part_name} from {filename}")
+                os.remove(os.path.join(filename, part_name))
+    
     def collect_all_states(self, animal_type: str, status: str, resume: bool = True, 
-                          after_date: Optional[str] = None) -> None:
+                          after_date: Optional[str] = None, max_workers: int = 1,
+                          skip_seen: bool = True, delta: bool = False,
+                          shutdown: Optional[threading.Event] = None,
+                          window_pages: Optional[int] = None) -> None:
         """
         Collect animal data across all US states with resume capability.
         
         Orchestrates data collection across all US states and DC, managing progress
         tracking and resumption when hitting API rate limits. Automatically skips
-        completed states and resumes partial collections.
+        completed states and resumes partial collections. Files go to the current run
+        (see start_run), so a collection spread over several days of quota stays in the
+        directory it started in.
+        
+        With `max_workers > 1` several locations are collected at once from a thread pool.
+        All threads share the client's rate limiter, so the combined request rate and the
+        daily budget are the same as for a sequential run. Once any location stops
+        partially (e.g. the daily limit is reached), no new locations are started.
+        
+        With `skip_seen`, a SeenIdIndex persisted next to the progress file lets every location
+        skip animals an earlier or overlapping location already saved, and the share of each
+        location's fetched animals that were duplicates is recorded as its overlap ratio.
+        
+        Every completed location records the newest `published_at` it saw as its watermark.
+        With `delta`, a location that has a watermark is only queried for animals published
+        after it (`sort='recent'` with the API's `after` filter), so a daily refresh costs a
+        few pages per location; use merge_delta to fold the result into the last full dataset.
+        A published-date watermark does not pick up status changes of older listings, so delta
+        runs are refused for statuses other than DELTA_STATUSES (e.g. 'adopted', whose animals
+        are adopted long after they are published), and a periodic full sweep is still needed
+        to drop adoptable listings that have since changed status.
+        
+        With `window_pages`, a location with more pages is split into published-date windows
+        (see plan_windows) the first time it is started. Each window is collected as a unit of
+        its own, with its own file, checkpoint and resume point, so the windows of one large
+        location run in parallel on the thread pool under the shared budget. Their results
+        merge through the id dedup of the seen-id index and combine_state_files. The location
+        completes, and its watermark moves, once all of its windows have completed.
         
         Args:
             animal_type (str): Type of animal to collect
             status (str): Status of animals to collect
             resume (bool): Whether to resume from previous progress
             after_date (Optional[str]): Filter animals published after this date
+            max_workers (int): Number of locations collected concurrently
+            skip_seen (bool): Whether to skip animals already collected from another location
+            delta (bool): Whether to only collect animals published after each location's watermark
+            shutdown (Optional[threading.Event]): When set, no new locations are started
+            window_pages (Optional[int]): Page count above which a location is split into windows
             
         Side Effects:
             - Creates CSV files for each state's data
             - Updates progress tracking files
             - Logs collection progress and status
+            
+        Raises:
+            ValueError: If `delta` is set for a status not in DELTA_STATUSES
         """
+        if delta:
+            _check_delta_status(status)
         logger.info(f"Starting collection: {status} {animal_type}s across all US states (published after {after_date or 'all time'})")
         
+        # Pages probed by an earlier call may be out of date by now
+        self._probed_pages.clear()
+        
+        # Continue the unfinished run, even if it started on an earlier day
+        run_id = self.start_run(animal_type, status, resume)
+        logger.info(f"Collecting into run {run_id}")
+        
         # Load progress
         progress = self.load_progress(animal_type, status) if resume else {
             'completed_states': [], 
@@ -537,65 +2069,285 @@ class StateBasedPetfinderClient:
             'partial_states': {},
             'session_start_time': datetime.now().isoformat()
         }
+        if not resume:
+            # Also empties the journal of the previous run
+            self.create_directory_structure(animal_type, status)
+            self.save_progress(animal_type, status, progress)
         
         states_to_process = [state for state in US_STATES if state not in progress['completed_states']]
         
+        # Follow the request plan, if one was made for this run
+        planned = self._planned_order(animal_type, status)
+        if planned:
+            rank = {state: index for index, state in enumerate(planned)}
+            states_to_process.sort(key=lambda state: rank.get(state, len(rank)))
+            logger.info("Processing locations in the order of the request plan")
+        
         if not states_to_process:
             logger.info("All states already completed!")
             return
         
-        logger.info(f"Processing {len(states_to_process)} states (skipping {len(progress['completed_states'])} already completed)")
+        logger.info(f"Processing {len(states_to_process)} states (skipping {len(US_STATES) - len(states_to_process)} already completed)")
         if progress['partial_states']:
             logger.info(f"Will resume {len(progress['partial_states'])} partially completed states")
         
+        seen_ids = None
+        if skip_seen:
+            self.create_directory_structure(animal_type, status)
+            seen_ids = SeenIdIndex(self.get_seen_ids_file(animal_type, status),
+                                   progress.get('seen_ids_count', 0))
+            if len(seen_ids):
+                logger.info(f"Loaded {len(seen_ids)} already collected animal ids")
+        
+        watermarks = self.load_watermarks(animal_type, status)
+        if delta:
+            logger.info(f"Delta mode: {len(watermarks)} locations have a watermark")
+        
+        # Split large locations into published-date windows, once per run
+        windows = progress.setdefault('windows', {})
+        plan = self._load_plan(animal_type, status)
+        planned_locations = plan['locations'] if plan else {}
+        if window_pages:
+            for state in states_to_process:
+                if state in windows or state in progress['partial_states']:
+                    continue
+                _, state_after = self._resume_point(progress, watermarks, state, after_date, delta)
+                planned = planned_locations.get(state, {})
+                total_pages = planned.get('total_pages') if planned.get('after') == state_after and not planned.get('estimated') else None
+                try:
+                    windows[state] = self.plan_windows(animal_type, status, state, state_after,
+                                                       window_pages, total_pages)
+                except DailyRequestLimitReached as e:
+                    logger.warning(f"Stopped splitting locations at {state}: {e}")
+                    self._probed_pages.clear()
+                    self.save_progress(animal_type, status, progress)
+                    logger.info(f"Resume later to continue from where you left off.")
+                    return
+                except Exception as e:
+                    logger.warning(f"Could not split {state} into windows, collecting it whole: {e}")
+            self.save_progress(animal_type, status, progress)
+        
+        # Units of work: whole locations, or the windows of split locations not yet completed
+        units = []
         for state in states_to_process:
+            if windows.get(state):
+                units.extend(unit for unit in (_window_unit(state, index) for index in range(len(windows[state])))
+                             if unit not in progress['completed_states'])
+            else:
+                units.append(state)
+        
+        stop_event = threading.Event()
+        
+        def stopped() -> bool:
+            return stop_event.is_set() or (shutdown is not None and shutdown.is_set())
+        
+        # With a plan and several workers, units are started in order and only while the
+        # budget left today also covers the planned requests of the units in progress. A
+        # unit that does not fit waits until it can run alone, so running out of budget
+        # leaves at most one unit partial, as planned
+        admission = threading.Condition()
+        reserved: Dict[str, int] = {}
+        turn = {unit: index for index, unit in enumerate(units)}
+        next_turn = 0
+        
+        def planned_requests(unit: str) -> int:
+            state, window = _split_unit(unit)
+            with self._progress_lock:
+                start_page = progress['partial_states'].get(unit, {}).get('last_page', 1)
+            info = planned_locations.get(state)
+            if info is None:
+                return 1
+            # Windows split a location into about equal page counts
+            pages = info['total_pages'] if window is None else -(-info['total_pages'] // len(windows[state]))
+            return max(1, pages - start_page + 1)
+        
+        def admit(unit: str) -> bool:
+            nonlocal next_turn
+            need = planned_requests(unit)
+            with admission:
+                while turn[unit] != next_turn:
+                    admission.wait(1)
+                try:
+                    while not stopped():
+                        if not reserved or need <= self.rate_limiter.remaining_today - sum(reserved.values()):
+                            reserved[unit] = need
+                            return True
+                        admission.wait(1)
+                    return False
+                finally:
+                    next_turn += 1
+                    admission.notify_all()
+        
+        def release(unit: str) -> None:
+            with admission:
+                reserved.pop(unit, None)
+                admission.notify_all()
+        
+        budgeted = plan is not None and max_workers > 1
+        
+        def collect(unit: str) -> None:
+            if budgeted:
+                if not admit(unit):
+                    return
+                try:
+                    collect_unit(unit)
+                finally:
+                    release(unit)
+            elif not stopped():
+                collect_unit(unit)
+        
+        def collect_unit(unit: str) -> None:
+            state, window = _split_unit(unit)
             try:
-                # Check if this state was partially completed
-                start_page = 1
-                if state in progress['partial_states']:
-                    start_page = progress['partial_states'][state]['last_page']
-                    logger.info(f"Resuming {state} from page {start_page}")
+                # Check if this state or window was partially completed
+                with self._progress_lock:
+                    if window is None:
+                        start_page, state_after = self._resume_point(progress, watermarks, state, after_date, delta)
+                        state_before = None
+                    else:
+                        start_page = progress['partial_states'].get(unit, {}).get('last_page', 1)
+                        state_after, state_before = windows[state][window]['after'], windows[state][window]['before']
+                    committed_size = progress['partial_states'].get(unit, {}).get('committed_size')
+                    if unit in progress['partial_states']:
+                        logger.info(f"Resuming {unit} from page {start_page}")
                 
-                result = self.collect_state_data(animal_type, status, state, after_date, start_page)
+                def checkpoint(next_page: int, total_animals: int, new_ids: List[int],
+                               size: Optional[int]) -> None:
+                    # Journal the resume point, and the ids written, as soon as the data is on disk
+                    with self._progress_lock:
+                        if seen_ids is not None:
+                            seen_ids.commit(new_ids)
+                        self.journal_checkpoint(animal_type, status, progress, {
+                            'state': unit,
+                            'last_page': next_page,
+                            'animals_collected': total_animals,
+                            'after': state_after,
+                            'committed_size': size,
+                            'seen_ids_count': seen_ids.count if seen_ids is not None else None
+                        })
                 
-                if result['completed']:
-                    # State fully completed
-                    progress['completed_states'].append(state)
-                    
-                    # Remove from failed/partial if it was there
-                    if state in progress['failed_states']:
-                        progress['failed_states'].remove(state)
-                    if state in progress['partial_states']:
-                        del progress['partial_states'][state]
+                result = self.collect_state_data(animal_type, status, state, state_after, start_page,
+                                                 before_date=state_before, window=window,
+                                                 on_checkpoint=checkpoint, seen_ids=seen_ids,
+                                                 committed_size=committed_size)
+                
+                with self._progress_lock:
+                    # Accumulate how much of this location's quota went on animals already collected
+                    overlap = progress.setdefault('overlap', {}).setdefault(state, {'fetched': 0, 'duplicates': 0})
+                    overlap['fetched'] += result['animals_fetched_this_session']
+                    overlap['duplicates'] += result['duplicates_skipped']
+                    if result['duplicates_skipped']:
+                        logger.info(f"{state}: skipped {result['duplicates_skipped']}/{result['animals_fetched_this_session']} "
+                                    f"animals already collected ({_overlap_ratio(overlap):.1%} overlap so far)")
                     
-                    logger.info(f"✓ Completed {state} ({len(progress['completed_states'])}/{len(US_STATES)}) - "
-                              f"Collected {result['animals_collected_this_session']} animals this session")
-                else:
-                    # State partially completed due to API limit
-                    progress['partial_states'][state] = {
-                        'last_page': result['last_page'],
-                        'animals_collected': result['total_animals']
-                    }
-                    logger.info(f"⏸ Partially completed {state} - stopped at page {result['last_page']} "
-                              f"with {result['total_animals']} animals due to API limit")
+                    if result['completed']:
+                        # State or window fully completed
+                        progress['completed_states'].append(unit)
+                        
+                        # Remove from failed/partial if it was there
+                        if unit in progress['failed_states']:
+                            progress['failed_states'].remove(unit)
+                        if unit in progress['partial_states']:
+                            del progress['partial_states'][unit]
+                        
+                        newest = result['newest_published_at']
+                        if window is not None:
+                            windows[state][window]['newest_published_at'] = newest
+                            window_units = [_window_unit(state, index) for index in range(len(windows[state]))]
+                            if all(other in progress['completed_states'] for other in window_units):
+                                # The last window completes the location
+                                progress['completed_states'].append(state)
+                                if state in progress['failed_states']:
+                                    progress['failed_states'].remove(state)
+                                for info in windows[state]:
+                                    newest = _later_timestamp(newest, info.get('newest_published_at'))
+                            else:
+                                logger.info(f"✓ Completed {unit} (window {window + 1}/{len(windows[state])} of {state}) - "
+                                            f"Collected {result['animals_collected_this_session']} animals this session")
+                        
+                        if state in progress['completed_states']:
+                            # Move the watermark forward for the next delta run
+                            if newest:
+                                watermarks[state] = _later_timestamp(watermarks.get(state), newest)
+                                self.save_watermarks(animal_type, status, watermarks)
+                            
+                            completed = sum(location in progress['completed_states'] for location in US_STATES)
+                            logger.info(f"✓ Completed {state} ({completed}/{len(US_STATES)}) - "
+                                      f"Collected {result['animals_collected_this_session']} animals this session")
+                    else:
+                        # State partially completed due to API limit, the last checkpoint
+                        # already holds its resume point
+                        logger.info(f"⏸ Partially completed {unit} - stopped at page {result['last_page']} "
+                                  f"with {result['total_animals']} animals due to API limit")
+                        stop_event.set()
                     
+                    # Compact the journal once per location rather than once per page
                     self.save_progress(animal_type, status, progress)
-                    logger.info(f"Resume later to continue from where you left off.")
-                    return
-                
-                self.save_progress(animal_type, status, progress)
                 
             except Exception as e:
-                logger.error(f"✗ Failed to collect {state}: {e}")
-                if state not in progress['failed_states']:
-                    progress['failed_states'].append(state)
-                self.save_progress(animal_type, status, progress)
-                continue
+                logger.error(f"✗ Failed to collect {unit}: {e}")
+                with self._progress_lock:
+                    if unit not in progress['failed_states']:
+                        progress['failed_states'].append(unit)
+                    self.save_progress(animal_type, status, progress)
+        
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(collect, units))
+        else:
+            for unit in units:
+                collect(unit)
+                if stopped():
+                    break
+        # Probed pages of locations not reached in this call are not reused later
+        self._probed_pages.clear()
+        
+        if stopped():
+            logger.info(f"Resume later to continue from where you left off.")
+            return
         
         logger.info(f"Collection complete! Completed: {len(progress['completed_states'])}, "
                    f"Partial: {len(progress['partial_states'])}, "
                    f"Failed: {len(progress['failed_states'])}")
     
+    def get_status(self, animal_type: str, status: str) -> Dict[str, Any]:
+        """
+        Collect the status of the current run as data.
+        
+        Args:
+            animal_type (str): Type of animal being collected
+            status (str): Status of animals being collected
+            
+        Returns:
+            Dict[str, Any]: Status containing:
+                - run_id: Current run
+                - completed, partial, failed, remaining: Number of locations in each state
+                - done: Whether every location has completed
+                - partial_states: last_page and animals_collected per partial location
+                - failed_states: Locations whose last attempt failed
+                - overlap: fetched and duplicates per location
+        """
+        progress = self.load_progress(animal_type, status)
+        # Windows of a split location are counted once, under their location: a location
+        # with a failed window counts as failed, even if other windows are partial
+        completed_locations = {state for state in US_STATES if state in progress['completed_states']}
+        failed_locations = {_split_unit(unit)[0] for unit in progress['failed_states']} - completed_locations
+        partial_locations = ({_split_unit(unit)[0] for unit in progress['partial_states']}
+                             - completed_locations - failed_locations)
+        completed, partial, failed = len(completed_locations), len(partial_locations), len(failed_locations)
+        return {
+            'run_id': self.get_run_id(animal_type, status),
+            'completed': completed,
+            'partial': partial,
+            'failed': failed,
+            'remaining': len(US_STATES) - completed - partial - failed,
+            'done': all(state in progress['completed_states'] for state in US_STATES),
+            'partial_states': {state: {'last_page': info['last_page'], 'animals_collected': info['animals_collected']}
+                               for state, info in progress['partial_states'].items()},
+            'failed_states': list(progress['failed_states']),
+            'overlap': progress.get('overlap', {})
+        }
+    
     def get_status_summary(self, animal_type: str, status: str) -> None:
         """
         Display a comprehensive summary of collection status.
@@ -611,12 +2363,12 @@ class StateBasedPetfinderClient:
         Side Effects:
             Logs formatted status information to stdout
         """
-        progress = self.load_progress(animal_type, status)
+        progress = self.get_status(animal_type, status)
         
-        completed = len(progress['completed_states'])
-        partial = len(progress['partial_states'])
-        failed = len(progress['failed_states'])
-        remaining = len(US_STATES) - completed - partial - failed
+        completed = progress['completed']
+        partial = progress['partial']
+        failed = progress['failed']
+        remaining = progress['remaining']
         
         logger.info(f"\n=== Collection Status for {status} {animal_type}s ===")
         logger.info(f"Completed states: {completed}/{len(US_STATES)}")
@@ -625,82 +2377,388 @@ class StateBasedPetfinderClient:
         logger.info(f"Remaining states: {remaining}")
         
         if progress['partial_states']:
-            logger(f"\nPartial states:")
+            logger.info(f"\nPartial states:")
             for state, info in progress['partial_states'].items():
                 logger.info(f"  {state}: stopped at page {info['last_page']}, {info['animals_collected']} animals")
         
         if progress['failed_states']:
             logger.info(f"\nFailed states: {', '.join(progress['failed_states'])}")
         
+        overlaps = {state: info for state, info in progress.get('overlap', {}).items() if info['duplicates']}
+        if overlaps:
+            fetched = sum(info['fetched'] for info in progress['overlap'].values())
+            duplicates = sum(info['duplicates'] for info in progress['overlap'].values())
+            logger.info(f"\nOverlap: {duplicates}/{fetched} fetched animals were already collected "
+                        f"({duplicates / fetched:.1%} of quota spent on duplicates)")
+            for state, info in sorted(overlaps.items(), key=lambda item: -_overlap_ratio(item[1])):
+                logger.info(f"  {state}: {info['duplicates']}/{info['fetched']} duplicates ({_overlap_ratio(info):.1%})")
+        
     
-    def combine_state_files(self, animal_type: str, status: str) -> Optional[str]:
+    def combine_state_files(self, animal_type: str, status: str, 
+                            chunksize: int = COMBINE_CHUNK_SIZE) -> Optional[str]:
         """
-        Combine individual state CSV files into a single master file with deduplication.
+        Combine individual state files into a single master file with deduplication.
         
-        Reads all individual state CSV files, combines them into a single DataFrame,
-        removes duplicate records based on animal ID, and maps Nevada ZIP codes to
-        'NV' state designation. Saves the combined file with standardized naming.
+        Streams all individual state files in the client's output format chunk by chunk,
+        removes duplicate records based on animal ID (keeping the first occurrence), maps
+        Nevada ZIP codes to 'NV' state designation and appends each chunk to the output as
+        it goes. Only the ids seen so far are kept in memory, in a compact SortedIdSet, so
+        peak memory follows the number of unique animals rather than the rows read.
         
         Args:
             animal_type (str): Type of animal files to combine
             status (str): Status of animal files to combine
+            chunksize (int): Rows read from a state file at a time
             
         Returns:
             Optional[str]: Path to combined output file if successful, None if failed
             
         Side Effects:
-            - Creates combined CSV file in the same directory
+            - Creates combined CSV or Parquet file in the same directory
             - Logs information about records processed and duplicates removed
         """
         logger.info(f"Combining {status} {animal_type} files...")
         
-        date_str = date.today().isoformat()
-        directory = os.path.join(animal_type, date_str, status)
+        directory = os.path.join(animal_type, self.get_run_id(animal_type, status), status)
         
         if not os.path.exists(directory):
             logger.error(f"Directory {directory} doesn't exist")
             return
         
-        csv_files = [f for f in os.listdir(directory) if f.endswith('.csv') and not f.startswith('all_')]
+        extension = f".{self.output_format}"
+        state_files = [f for f in os.listdir(directory) if f.endswith(extension) and not f.startswith('all_')]
         
-        if not csv_files:
-            logger.warning(f"No CSV files found in {directory}")
+        if not state_files:
+            logger.warning(f"No {self.output_format} files found in {directory}")
             return
         
-        all_dfs = []
-        for file in csv_files:
-            file_path = os.path.join(directory, file)
-            try:
-                df = pd.read_csv(file_path)
-                all_dfs.append(df)
-                logger.info(f"Loaded {len(df)} records from {file}")
-            except Exception as e:
-                logger.error(f"Error reading {file}: {e}")
+        output_file = os.path.join(directory, f"all_{status}_{animal_type}s{extension}")
+        seen_ids = SortedIdSet()
+        counts = {'read': 0}
+        
+        def unique_chunks() -> Iterator[pd.DataFrame]:
+            for file in state_files:
+                file_path = os.path.join(directory, file)
+                file_count = 0
+                try:
+                    for chunk in iter_animal_file(file_path, chunksize):
+                        file_count += len(chunk)
+                        
+                        # Remove duplicates, within the chunk and against everything written so far
+                        chunk = chunk[seen_ids.add_new(chunk['id'].to_numpy())]
+                        
+                        # Map the NV postcodes into 'NV'
+                        state_q = chunk['stateQ'].astype(str)
+                        yield chunk.assign(stateQ=state_q,
+                                           stateQ_grouped=np.where(state_q.isin(NV_POSTCODES), 'NV', state_q))
+                    logger.info(f"Loaded {file_count} records from {file}")
+                except Exception as e:
+                    logger.error(f"Error reading {file}: {e}")
+                counts['read'] += file_count
+        
+        final_count = self._write_chunks(output_file, unique_chunks())
+        
+        if final_count == 0:
+            logger.error("No data to combine")
+            return
+        
+        duplicates_removed = counts['read'] - final_count
+        if duplicates_removed > 0:
+            logger.info(f"Removed {duplicates_removed} duplicate records")
+        
+        logger.info(f"Combined file saved: {output_file} ({final_count} unique records)")
+        return output_file
+    
+    def _write_chunks(self, output_file: str, chunks: Iterator[pd.DataFrame]) -> int:
+        """
+        Write a stream of chunks to a combined file in the client's output format.
         
-        if all_dfs:
-            combined_df = pd.concat(all_dfs, ignore_index=True)
+        Chunks are written to a temporary file that replaces `output_file` only once the
+        stream is exhausted, so a failure leaves the previous file untouched. Nothing is
+        written if the stream holds no rows.
+        
+        Args:
+            output_file (str): CSV or Parquet file to create
+            chunks (Iterator[pd.DataFrame]): Chunks with identical columns
+            
+        Returns:
+            int: Number of rows written
+        """
+        tmp_file = f"{output_file}.tmp"
+        row_count = 0
+        parquet_writer = None
+        
+        try:
+            for chunk in chunks:
+                if self.output_format == 'parquet':
+                    if parquet_writer is None:
+                        parquet_writer = _open_parquet_writer(tmp_file, chunk)
+                    _write_parquet_chunk(parquet_writer, chunk)
+                else:
+                    chunk.to_csv(tmp_file, mode='w' if row_count == 0 else 'a',
+                                 header=row_count == 0, index=False)
+                row_count += len(chunk)
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+        
+        if row_count == 0:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return 0
+        
+        os.replace(tmp_file, output_file)
+        return row_count
+    
+    def find_previous_combined_file(self, animal_type: str, status: str) -> Optional[str]:
+        """
+        Find the most recent combined file from a run before the current one.
+        
+        Args:
+            animal_type (str): Type of animal
+            status (str): Status of animals
+            
+        Returns:
+            Optional[str]: Path to the latest earlier `all_{status}_{animal_type}s` file, if any
+        """
+        if not os.path.isdir(animal_type):
+            return None
+        
+        current_run = self.get_run_id(animal_type, status)
+        file_name = f"all_{status}_{animal_type}s.{self.output_format}"
+        for run_id in sorted(os.listdir(animal_type), reverse=True):
+            path = os.path.join(animal_type, run_id, status, file_name)
+            if run_id < current_run and os.path.exists(path):
+                return path
+        return None
+    
+    def merge_delta(self, animal_type: str, status: str, base_file: Optional[str] = None,
+                    chunksize: int = COMBINE_CHUNK_SIZE) -> Optional[str]:
+        """
+        Merge the current run's delta collection into the previous full dataset.
+        
+        Reads the run's combined file (the animals collected by a delta run), then streams the
+        previous combined dataset chunk by chunk, dropping animals that the delta collected
+        again so their newest record wins. The merged dataset replaces the run's combined
+        file, so downstream steps read a complete dataset as after a full sweep.
+        
+        Args:
+            animal_type (str): Type of animal
+            status (str): Status of animals
+            base_file (Optional[str]): Dataset to merge into, defaults to the latest combined
+                file from an earlier run
+            chunksize (int): Rows read from the base dataset at a time
             
-            # Remove duplicates
-            initial_count = len(combined_df)
-            combined_df = combined_df.drop_duplicates(subset=['id'], keep='first')
-            final_count = len(combined_df)
+        Returns:
+            Optional[str]: Path to the merged file, None if there was nothing to merge
+        """
+        directory = os.path.join(animal_type, self.get_run_id(animal_type, status), status)
+        delta_file = os.path.join(directory, f"all_{status}_{animal_type}s.{self.output_format}")
+        base_file = base_file or self.find_previous_combined_file(animal_type, status)
+        
+        if not os.path.exists(delta_file):
+            logger.error(f"No combined delta file {delta_file} to merge")
+            return None
+        if not base_file or not os.path.exists(base_file):
+            logger.warning("No previous dataset found, keeping the delta file as the full dataset")
+            return delta_file
+        
+        delta_df = read_animal_file(delta_file)
+        delta_ids = SortedIdSet()
+        delta_ids.add_new(delta_df['id'].to_numpy())
+        counts = {'replaced': 0}
+        
+        def merged_chunks() -> Iterator[pd.DataFrame]:
+            yield delta_df
+            for chunk in iter_animal_file(base_file, chunksize):
+                updated = delta_ids.contains(chunk['id'].to_numpy())
+                counts['replaced'] += int(updated.sum())
+                yield chunk[~updated][delta_df.columns]
+        
+        row_count = self._write_chunks(delta_file, merged_chunks())
+        logger.info(f"Merged {len(delta_df)} delta records into {base_file} "
+                    f"({counts['replaced']} updated, {len(delta_df) - counts['replaced']} new): "
+                    f"{delta_file} ({row_count} records)")
+        return delta_file
 
-            # Map the NV postcodes into 'NV'
-            combined_df['stateQ'] = combined_df['stateQ'].astype(str)
-            combined_df['stateQ_grouped'] = np.where(combined_df['stateQ'].isin(NV_POSTCODES), 'NV', combined_df['stateQ'])
+    def run_service(self, animal_type: str, statuses: List[str], after_date: Optional[str] = None,
+                    max_workers: int = 1, delta: bool = False,
+                    status_file: Optional[str] = SERVICE_STATUS_FILE,
+                    repeat_every: Optional[float] = None, window_pages: Optional[int] = None) -> None:
+        """
+        Collect several statuses unattended, sleeping through daily quota resets.
+        
+        Each cycle resumes collect_all_states for every status of the sweep that is not
+        done, in order, so one day's budget flows from one status into the next. When the
+        daily budget is used up the service sleeps until it resets (UTC midnight plus
+        QUOTA_RESET_MARGIN). If a cycle ends with budget left but locations failed or
+        stopped early, they are retried after a jittered exponential backoff starting at
+        FAILED_RETRY_DELAY; a status still unfinished after MAX_FAILED_RETRIES retries is
+        left as is for this sweep. Once the sweep is over every status is combined (and
+        merged with merge_delta in delta mode). With `repeat_every` a new sweep starts
+        that long after, otherwise the service returns.
+        
+        The service state and the get_status data of every status are written to
+        `status_file` at each step. SIGINT and SIGTERM stop the service once the locations
+        in progress finish; their progress is kept for the next start. The previous signal
+        handlers are restored when the service returns. A server that keeps answering 429
+        while the local count still shows budget (e.g. another process uses the same key)
+        counts as a used-up quota, so the service sleeps until the reset instead of retrying.
+        
+        Args:
+            animal_type (str): Type of animal to collect
+            statuses (List[str]): Statuses to collect, e.g. ['adopted', 'adoptable']
+            after_date (Optional[str]): Filter animals published after this date
+            max_workers (int): Number of locations collected concurrently
+            delta (bool): Whether to only collect animals published after each location's watermark
+            status_file (Optional[str]): JSON file the service state is written to, None to disable
+            repeat_every (Optional[float]): Seconds between the end of a sweep and the next
+            window_pages (Optional[int]): Page count above which a location is split into windows
+            
+        Raises:
+            ValueError: If `delta` is set and a status is not in DELTA_STATUSES
+        """
+        if delta:
+            for status in statuses:
+                _check_delta_status(status)
+        
+        shutdown = threading.Event()
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.getsignal(signum)
+                signal.signal(signum, lambda *_: shutdown.set())
+        
+        try:
+            self._service_loop(animal_type, statuses, after_date, max_workers, delta, status_file,
+                               repeat_every, window_pages, shutdown)
+        finally:
+            # Give Ctrl+C and SIGTERM back to the caller
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler if handler is not None else signal.SIG_DFL)
+    
+    def _service_loop(self, animal_type: str, statuses: List[str], after_date: Optional[str],
+                      max_workers: int, delta: bool, status_file: Optional[str],
+                      repeat_every: Optional[float], window_pages: Optional[int],
+                      shutdown: threading.Event) -> None:
+        """Sweep loop of run_service, returns when the sweep is over or `shutdown` is set."""
+        retry_rounds: Dict[str, int] = {}  # retries made per status in this sweep
+        
+        def report(state: str, wait: Optional[float] = None) -> None:
+            if not status_file:
+                return
+            service_status = {
+                'state': state,
+                'updated_at': datetime.now().isoformat(),
+                'wake_at': datetime.fromtimestamp(time.time() + wait).isoformat() if wait else None,
+                'requests_left_today': self.rate_limiter.remaining_today,
+                'retry_rounds': retry_rounds,
+                'statuses': {status: self.get_status(animal_type, status) for status in statuses}
+            }
+            tmp_file = f"{status_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(service_status, f, indent=2)
+            os.replace(tmp_file, status_file)
+        
+        logger.info(f"Starting collection service for {', '.join(statuses)} {animal_type}s")
+        while not shutdown.is_set():
+            retry_rounds.clear()
+            started = set()  # statuses collected at least once in this sweep
+            retrying = set()  # statuses whose next collection is a retry after failures
+            gave_up = set()  # statuses still failing after MAX_FAILED_RETRIES retries
+            
+            while not shutdown.is_set():
+                for status in statuses:
+                    if shutdown.is_set():
+                        break
+                    if status in gave_up:
+                        continue
+                    if status in started and self.get_status(animal_type, status)['done']:
+                        continue
+                    report('collecting')
+                    try:
+                        self.collect_all_states(animal_type, status, resume=True, after_date=after_date,
+                                                max_workers=max_workers, delta=delta, shutdown=shutdown,
+                                                window_pages=window_pages)
+                    except Exception as e:
+                        logger.error(f"Collection of {status} {animal_type}s failed: {e}")
+                    started.add(status)
+                    if status in retrying:
+                        retry_rounds[status] = retry_rounds.get(status, 0) + 1
+                if shutdown.is_set():
+                    break
+                
+                unfinished = [status for status in statuses
+                              if status not in gave_up and not self.get_status(animal_type, status)['done']]
+                if not unfinished:
+                    break
+                
+                if self.rate_limiter.remaining_today == 0:
+                    # Running out of budget is not a failure, the next collection is no retry
+                    retrying = set()
+                    wait = self.rate_limiter.seconds_until_reset() + QUOTA_RESET_MARGIN
+                    logger.info(f"Daily budget used up, sleeping {wait / 3600:.1f}h until it resets")
+                    report('waiting for quota', wait)
+                else:
+                    # Budget is left, so failures stopped these statuses: retry with backoff
+                    gave_up.update(status for status in unfinished
+                                   if retry_rounds.get(status, 0) >= MAX_FAILED_RETRIES)
+                    retrying = {status for status in unfinished if status not in gave_up}
+                    if not retrying:
+                        break
+                    rounds = max(retry_rounds.get(status, 0) for status in retrying) + 1
+                    wait = FAILED_RETRY_DELAY * 2 ** (rounds - 1) * random.uniform(0.5, 1.0)
+                    logger.info(f"Retrying unfinished locations of {', '.join(sorted(retrying))} "
+                                f"in {wait / 60:.0f} min (round {rounds}/{MAX_FAILED_RETRIES})")
+                    report('waiting to retry', wait)
+                shutdown.wait(wait)
             
-            duplicates_removed = initial_count - final_count
-            if duplicates_removed > 0:
-                logger.info(f"Removed {duplicates_removed} duplicate records")
+            if shutdown.is_set():
+                break
             
-            # Save combined file
-            output_file = os.path.join(directory, f"all_{status}_{animal_type}s.csv")
-            combined_df.to_csv(output_file, index=False)
+            for status in statuses:
+                if status in gave_up:
+                    logger.warning(f"Gave up on the unfinished locations of {status} {animal_type}s for this sweep")
+                try:
+                    self.combine_state_files(animal_type, status)
+                    if delta:
+                        self.merge_delta(animal_type, status)
+                except Exception as e:
+                    logger.error(f"Combining {status} {animal_type}s failed: {e}")
             
-            logger.info(f"Combined file saved: {output_file} ({final_count} unique records)")
-            return output_file
-        else:
-            logger.error("No data to combine")
+            if not repeat_every:
+                report('done')
+                logger.info("Collection service finished the sweep")
+                return
+            logger.info(f"Sweep finished, starting the next one in {repeat_every / 3600:.1f}h")
+            report('waiting for next sweep', repeat_every)
+            shutdown.wait(repeat_every)
+        
+        report('stopped')
+        logger.info("Collection service stopped, progress is kept for the next start")
+
+
+def setup_logging(log_file: Optional[str] = LOG_FILE, console: bool = True) -> None:
+    """
+    Send log records to the collection log file and the console.
+    
+    Called by main() rather than at import, so importing the module (e.g. for NV_POSTCODES
+    or from the benchmark) does not create a log file in the working directory.
+    
+    Args:
+        log_file (Optional[str]): Log file to append to, None for no file
+        console (bool): Whether to also log to the console
+    """
+    handlers: List[logging.Handler] = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    if console:
+        handlers.append(logging.StreamHandler())
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
 
 
 def main() -> None:
@@ -726,6 +2784,7 @@ def main() -> None:
         SystemExit: If required environment variables are missing
         Exception: For API authentication or data collection failures
     """
+    setup_logging()
     load_dotenv()
     API_KEY = os.getenv("PETFINDER_API_KEY")
     SECRET = os.getenv("PETFINDER_SECRET_KEY")
@@ -734,17 +2793,32 @@ def main() -> None:
         logger.error("Missing API credentials in .env file")
         return
     
-    client = StateBasedPetfinderClient(API_KEY, SECRET)
+    client = StateBasedPetfinderClient(API_KEY, SECRET, run_id=RUN_ID)
     
     logger.info(f"<------------------------ Starting {ANIMAL_TYPE.upper()} Data Collection ------------------------>")
     
     # Check current status before starting
     client.get_status_summary(ANIMAL_TYPE, ADOPTION_STATUS)
     
+    if SERVICE_MODE:
+        client.run_service(ANIMAL_TYPE, SERVICE_STATUSES, after_date=PUBLISHED_AFTER_DATE,
+                           max_workers=MAX_CONCURRENT_LOCATIONS, delta=DELTA_MODE,
+                           repeat_every=SERVICE_REPEAT_HOURS * 3600 if SERVICE_REPEAT_HOURS else None,
+                           window_pages=WINDOW_TARGET_PAGES)
+        return
+    
+    if DRY_RUN:
+        client.plan_budget(ANIMAL_TYPE, ADOPTION_STATUS, after_date=PUBLISHED_AFTER_DATE, delta=DELTA_MODE)
+        return
+    
     # Collect animals of a specific status after a certain published date
     try:
-        client.collect_all_states(ANIMAL_TYPE, ADOPTION_STATUS, resume=True, after_date=PUBLISHED_AFTER_DATE)
+        client.collect_all_states(ANIMAL_TYPE, ADOPTION_STATUS, resume=True, after_date=PUBLISHED_AFTER_DATE,
+                                  max_workers=MAX_CONCURRENT_LOCATIONS, delta=DELTA_MODE,
+                                  window_pages=WINDOW_TARGET_PAGES)
         client.combine_state_files(ANIMAL_TYPE, ADOPTION_STATUS)
+        if DELTA_MODE:
+            client.merge_delta(ANIMAL_TYPE, ADOPTION_STATUS)
     except Exception as e:
         logger.error(f"Error collecting {ADOPTION_STATUS} {ANIMAL_TYPE}s: {e}")
     
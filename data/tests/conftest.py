@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The data scripts are plain modules, imported by name like the notebook does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
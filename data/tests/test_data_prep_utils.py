@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from data_prep_utils import CatColorImputer
+
+
+def _imputation_frame():
+    descriptions = [
+        "A sweet black and white tuxedo boy",
+        "Calico girl with orange, black and white patches",
+        "Our brown tabby loves to play",
+        "Gorgeous seal point with blue eyes",
+        "Sleek solid black panther",
+        "Loves naps and chin scratches",
+        "",
+        None,
+        "Orange and white, very chatty",
+        "Gray tabby with white paws",
+        "No colour mentioned here at all",
+        "Tortie with a big personality",
+    ]
+    known = [None, None, None, 'White', None, None, None, 'Black', None, None, 'Gray', None]
+    frame = pd.DataFrame({'description': descriptions * 5, 'name': 'Kitty', 'colors_primary': known * 5})
+    # Duplicate, unordered labels catch positional/label mix-ups
+    frame.index = np.arange(len(frame))[::-1] % 7
+    return frame
+
+
+def test_impute_colors_batch_serial_and_parallel_agree():
+    frame = _imputation_frame()
+
+    row_wise = CatColorImputer().impute_colors(frame, batch=False)
+    batched = CatColorImputer().impute_colors(frame, batch=True)
+    parallel = CatColorImputer(n_jobs=2).impute_colors(frame, batch=True)
+
+    assert batched == row_wise
+    assert parallel == row_wise
+
+    results, scores, methods = row_wise
+    # The fixture exercises every path: known colours, multi-colour matches and no match
+    assert {'original', 'description', 'none'} <= set(methods)
+    assert {'Black & White / Tuxedo', 'Calico', 'Orange & White'} <= set(results)
+    assert scores.count(0.0) == methods.count('none')
+
+
+def test_time_budgeted_validation_reuses_one_pool(monkeypatch):
+    frame = _imputation_frame()
+    frame = pd.concat([frame] * 20, ignore_index=True)
+    frame['cleaned_color'] = CatColorImputer().impute_colors(frame)[0]
+
+    pools_started = []
+    original_pool = CatColorImputer._process_pool
+    monkeypatch.setattr(CatColorImputer, '_process_pool',
+                        lambda self: pools_started.append(1) or original_pool(self))
+
+    expected, _ = CatColorImputer().validate_imputation(frame, test_fraction=0.5, random_state=0)
+    budgeted, _ = CatColorImputer(n_jobs=2).validate_imputation(frame, test_fraction=0.5, random_state=0,
+                                                                time_budget=60, batch_size=50)
+
+    assert len(pools_started) == 1
+    assert budgeted['total_tested'] == expected['total_tested']
+    assert budgeted['overall_accuracy'] == expected['overall_accuracy']
+
+
+def test_stratified_sample_respects_cap_with_many_small_strata():
+    # One large colour and 40 colours with 1-3 rows each
+    colors = np.array(['Black'] * 500 + [f"Rare {i}" for i in range(40) for _ in range(1 + i % 3)], dtype=object)
+    positions = np.arange(len(colors)) * 2
+
+    for test_size in (10, 40, 60, 150):
+        sampled = CatColorImputer._stratified_positions(colors, positions, test_size, random_state=0)
+        assert len(sampled) == test_size
+        assert len(np.unique(sampled)) == test_size
+        assert set(sampled) <= set(positions)
+
+        sampled_colors = set(colors[sampled // 2])
+        if test_size >= 41:
+            # Room for every colour: each keeps at least one row
+            assert sampled_colors == set(colors)
+        else:
+            assert len(sampled_colors) == test_size
+
+
+def test_stratified_validation_never_exceeds_max_samples():
+    frame = _imputation_frame()
+    frame = pd.concat([frame] * 10, ignore_index=True)
+    frame['cleaned_color'] = [f"Colour {i % 37}" for i in range(len(frame))]
+
+    summary, results = CatColorImputer().validate_imputation(frame, test_fraction=1.0, max_samples=25,
+                                                              stratify=True)
+
+    assert summary['total_sampled'] == 25
+    assert len(results) == 25
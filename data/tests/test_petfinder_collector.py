@@ -0,0 +1,285 @@
+import os
+import signal
+import threading
+
+import pandas as pd
+import pytest
+
+import petfinder_collector as collector
+from mock_petfinder_server import MockPetfinderConfig, MockPetfinderServer
+
+
+@pytest.fixture
+def mock_api():
+    servers = []
+
+    def start(**settings):
+        server = MockPetfinderServer(MockPetfinderConfig(**settings))
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def _client(server, limiter=None, **kwargs):
+    limiter = limiter or collector.AdaptiveRateLimiter(rate=100, daily_limit=10 ** 6, state_file=None)
+    return collector.StateBasedPetfinderClient('key', 'secret', rate_limiter=limiter, token_cache_file=None,
+                                               base_url=server.base_url, **kwargs)
+
+
+def test_rate_limit_burst_backs_off_and_recovers(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = mock_api(animals_per_location=1500, rate_limit_rate=0.3, retry_after=0.05)
+    limiter = collector.AdaptiveRateLimiter(rate=8, min_rate=4, max_rate=8, daily_limit=10 ** 6, state_file=None)
+
+    rates, pauses = [], []
+    record_response = limiter.record_response
+
+    def recording(response, attempt=0):
+        paused = record_response(response, attempt)
+        rates.append((response.status_code, limiter.rate))
+        pauses.append(paused)
+        return paused
+
+    monkeypatch.setattr(limiter, 'record_response', recording)
+    result = _client(server, limiter, run_id='burst').collect_state_data('cat', 'adoptable', 'TX',
+                                                                         prefetch_window=1)
+
+    stats = server.snapshot()
+    assert result['completed']
+    assert result['total_animals'] == 1500
+    assert stats['pages_served'] == 15
+    assert stats['status_codes'].get('429', 0) > 0
+
+    # Every 429 halves the rate (down to min_rate) and pauses for the server's Retry-After
+    limited = [i for i, (status_code, _) in enumerate(rates) if status_code == 429]
+    assert all(pauses[i] == pytest.approx(0.05) for i in limited)
+    assert min(rate for _, rate in rates) == limiter.min_rate
+    assert all(rate >= limiter.min_rate for _, rate in rates)
+    # Successful responses after the last 429 speed it back up
+    assert rates[-1][1] > rates[limited[-1]][1]
+
+
+def test_planned_day_ends_on_at_most_one_partial_location(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sizes = {state: 100 * (1 + index % 5) for index, state in enumerate(collector.US_STATES)}
+    server = mock_api(animals_per_location=100, location_sizes=sizes)
+    limiter = collector.AdaptiveRateLimiter(rate=200, daily_limit=200, state_file=None)
+    client = _client(server, limiter, run_id='planned')
+
+    # Probing every location uses part of today's budget, the plan packs the rest
+    plan = client.plan_budget('cat', 'adoptable')
+    first_day = plan['days'][0]
+    assert sum(entry['last_page'] - entry['first_page'] + 1 for entry in first_day) == limiter.remaining_today
+
+    client.collect_all_states('cat', 'adoptable', max_workers=4)
+
+    progress = client.load_progress('cat', 'adoptable')
+    assert limiter.remaining_today == 0
+    assert len(progress['partial_states']) <= 1
+
+
+def test_service_retries_failed_status_max_failed_retries_times(mock_api, tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'MAX_FAILED_RETRIES', 2)
+    monkeypatch.setattr(collector, 'FAILED_RETRY_DELAY', 0.001)
+    client = _client(mock_api())
+
+    # Every collection fails, leaving the status unfinished with budget left
+    collections = []
+    monkeypatch.setattr(client, 'collect_all_states', lambda animal_type, status, **kwargs: collections.append(status))
+
+    caplog.set_level('INFO', logger='petfinder_collector')
+    # Off the main thread, so the service leaves the test runner's signal handlers alone
+    service = threading.Thread(target=client.run_service, args=('cat', ['adopted']), kwargs={'status_file': None})
+    service.start()
+    service.join(timeout=30)
+
+    retries = [record.getMessage() for record in caplog.records if record.getMessage().startswith('Retrying')]
+    assert not service.is_alive()
+    assert len(collections) == 1 + 2
+    assert [message.rsplit('round ', 1)[1] for message in retries] == ['1/2)', '2/2)']
+    assert any(record.getMessage().startswith('Gave up') for record in caplog.records)
+
+
+def test_finished_run_is_followed_by_a_new_run_on_the_same_day(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA', 'TX'])
+    server = mock_api(animals_per_location=150)
+    client = _client(server)
+
+    client.collect_all_states('cat', 'adopted')
+    first_run = client.get_run_id('cat', 'adopted')
+    assert first_run == collector._utc_today()
+    assert client.get_status('cat', 'adopted')['done']
+    client.combine_state_files('cat', 'adopted')
+    pages = server.snapshot()['pages_served']
+
+    # A repeated sweep collects again, into a run of its own
+    client.collect_all_states('cat', 'adopted')
+    second_run = client.get_run_id('cat', 'adopted')
+    assert second_run == f"{first_run}_02"
+    assert server.snapshot()['pages_served'] == 2 * pages
+    assert client.find_previous_combined_file('cat', 'adopted').startswith(os.path.join('cat', first_run))
+
+
+def test_window_planning_reuses_page_one_of_locations_left_whole(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA', 'TX', 'NY'])
+    server = mock_api(location_sizes={'CA': 2000, 'TX': 300, 'NY': 150})
+    client = _client(server, run_id='windows')
+
+    requested = []
+    make_request = client._make_request
+
+    def recording(url, params):
+        requested.append((params['location'], params['page'], params.get('before')))
+        return make_request(url, params)
+
+    monkeypatch.setattr(client, '_make_request', recording)
+    client.collect_all_states('cat', 'adoptable', window_pages=5)
+
+    progress = client.load_progress('cat', 'adoptable')
+    assert len(progress['windows']['CA']) > 1
+    assert progress['windows']['TX'] == progress['windows']['NY'] == []
+    # TX and NY are sized by their first page and collected without fetching it again
+    assert requested.count(('TX', 1, None)) == 1
+    assert requested.count(('NY', 1, None)) == 1
+    assert sum(location == 'TX' for location, _, _ in requested) == 3
+    assert sum(location == 'NY' for location, _, _ in requested) == 2
+    assert set(progress['completed_states']) >= {'CA', 'TX', 'NY'}
+
+
+def test_animals_without_an_id_are_skipped(mock_api, tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA'])
+    client = _client(mock_api(animals_per_location=150), run_id='no-id')
+
+    fetch_page = client._fetch_page
+
+    def without_first_id(params, page):
+        data = fetch_page(params, page)
+        if page == 1:
+            del data['animals'][0]['id']
+        return data
+
+    monkeypatch.setattr(client, '_fetch_page', without_first_id)
+    caplog.set_level('WARNING', logger='petfinder_collector')
+    client.collect_all_states('cat', 'adoptable')
+
+    combined = pd.read_csv(client.combine_state_files('cat', 'adoptable'))
+    assert client.load_progress('cat', 'adoptable')['completed_states'] == ['CA']
+    assert len(combined) == 149
+    assert combined['id'].notna().all()
+    assert any('without an id' in record.getMessage() for record in caplog.records)
+
+
+def test_delta_runs_are_refused_for_adopted_animals(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA'])
+    server = mock_api(animals_per_location=150)
+    client = _client(server, run_id='delta')
+
+    # Adoptions happen long after publication, so a published_at watermark would miss them
+    with pytest.raises(ValueError, match='status_changed_at'):
+        client.collect_all_states('cat', 'adopted', delta=True)
+    with pytest.raises(ValueError, match='status_changed_at'):
+        client.plan_budget('cat', 'adopted', delta=True)
+    with pytest.raises(ValueError, match='status_changed_at'):
+        client.run_service('cat', ['adoptable', 'adopted'], delta=True, status_file=None)
+    assert server.snapshot()['animal_requests'] == 0
+
+    client.collect_all_states('cat', 'adoptable', delta=True)
+    assert client.get_status('cat', 'adoptable')['done']
+
+
+def test_service_restores_previous_signal_handlers(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA'])
+    client = _client(mock_api(animals_per_location=150))
+
+    def handler(signum, frame):
+        pass
+
+    previous = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    signal.signal(signal.SIGTERM, handler)
+    try:
+        client.run_service('cat', ['adoptable'], status_file=None)
+        assert signal.getsignal(signal.SIGTERM) is handler
+        assert signal.getsignal(signal.SIGINT) is previous[signal.SIGINT]
+    finally:
+        for signum, old_handler in previous.items():
+            signal.signal(signum, old_handler)
+
+
+def test_service_sleeps_when_server_quota_runs_out_before_the_local_count(mock_api, tmp_path, monkeypatch,
+                                                                         caplog):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA'])
+    monkeypatch.setattr(collector, 'QUOTA_RESET_MARGIN', 0)
+    monkeypatch.setattr(collector, 'FAILED_RETRY_DELAY', 0.001)
+    # Another process used most of the key's quota: the server stops after 3 pages
+    server = mock_api(animals_per_location=500, daily_limit=3)
+    limiter = collector.AdaptiveRateLimiter(rate=100, backoff_base=0.01, daily_limit=10 ** 6, state_file=None)
+    client = _client(server, limiter)
+
+    def next_day():
+        server.config.daily_limit = None
+        monkeypatch.setattr(collector, '_utc_today', lambda: '2099-01-01')
+        return 0.01
+
+    monkeypatch.setattr(limiter, 'seconds_until_reset', next_day)
+    caplog.set_level('INFO', logger='petfinder_collector')
+    service = threading.Thread(target=client.run_service, args=('cat', ['adoptable']), kwargs={'status_file': None},
+                               daemon=True)
+    service.start()
+    service.join(timeout=30)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert not service.is_alive()
+    assert any(message.startswith('Daily budget used up') for message in messages)
+    assert not any(message.startswith(('Retrying', 'Gave up')) for message in messages)
+    assert client.get_status('cat', 'adoptable')['done']
+
+
+def test_status_counts_a_split_location_once(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['CA', 'TX', 'NY'])
+    client = _client(mock_api(), run_id='status')
+
+    # One window of CA stopped early and another failed, TX has two partial windows
+    partial = {'last_page': 3, 'animals_collected': 200}
+    client.create_directory_structure('cat', 'adoptable')
+    client.save_progress('cat', 'adoptable', {
+        'completed_states': ['NY'],
+        'failed_states': ['CA.w01'],
+        'partial_states': {'CA.w00': partial, 'TX.w00': partial, 'TX.w02': partial},
+    })
+
+    status = client.get_status('cat', 'adoptable')
+    assert (status['completed'], status['partial'], status['failed'], status['remaining']) == (1, 1, 1, 0)
+
+
+def test_page_one_probed_by_an_earlier_call_is_fetched_again(mock_api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(collector, 'US_STATES', ['TX'])
+    client = _client(mock_api(location_sizes={'TX': 300}), run_id='stale')
+
+    requested = []
+    make_request = client._make_request
+
+    def recording(url, params):
+        requested.append((params['location'], params['page']))
+        return make_request(url, params)
+
+    monkeypatch.setattr(client, '_make_request', recording)
+    # TX is small enough to stay whole, so its probed first page is kept for collection
+    assert client.plan_windows('cat', 'adoptable', 'TX', None, target_pages=5) == []
+
+    client.collect_all_states('cat', 'adoptable')
+
+    assert requested.count(('TX', 1)) == 2
+    assert client.get_status('cat', 'adoptable')['done']
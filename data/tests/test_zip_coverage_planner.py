@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from petfinder_collector import NV_POSTCODES
+from zip_coverage_planner import (DEFAULT_CENTROIDS_FILE, STATE_ZIP_PREFIXES, coverage_matrix, load_zip_centroids,
+                                  plan_coverage)
+
+
+def _centroids(lats, lons):
+    return pd.DataFrame({'zip': [f"{89000 + i:05d}" for i in range(len(lats))], 'lat': lats, 'lon': lons})
+
+
+def _covered(centroids, zips, radius):
+    chosen = centroids['zip'].isin(zips).to_numpy()
+    return coverage_matrix(centroids, radius)[chosen].any(axis=0)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_plan_covers_every_zip(seed):
+    rng = np.random.default_rng(seed)
+    centroids = _centroids(rng.uniform(35, 42, 120), rng.uniform(-120, -114, 120))
+
+    planned = plan_coverage(centroids, radius_miles=60)
+
+    assert _covered(centroids, planned, 60).all()
+    assert len(planned) < len(centroids)
+
+
+def test_pruning_keeps_every_zip_covered():
+    # Greedy first takes the central 89000, which the queries it then adds for the outer
+    # points make redundant
+    centroids = _centroids([37.4, 38.7, 37.3, 37.5, 38.0, 37.3, 36.5],
+                           [-115.6, -115.9, -114.2, -116.5, -115.1, -116.8, -117.0])
+
+    planned = plan_coverage(centroids, radius_miles=75)
+
+    assert planned == ['89004', '89006']
+    assert _covered(centroids, planned, 75).all()
+    # Every query left is needed: dropping any of them uncovers a ZIP
+    for zip_code in planned:
+        assert not _covered(centroids, [z for z in planned if z != zip_code], 75).all()
+
+
+def test_bundled_centroids_cover_the_nevada_zip_queries():
+    centroids = load_zip_centroids(DEFAULT_CENTROIDS_FILE, state='NV')
+
+    assert set(centroids['zip'].str[:3]) <= set(STATE_ZIP_PREFIXES['NV'])
+    assert set(NV_POSTCODES) <= set(centroids['zip'])
+    assert _covered(centroids, plan_coverage(centroids), 100).all()
@@ -0,0 +1,242 @@
+"""
+ZIP Coverage Planner for PetFinder Radius Queries
+
+This script plans the ZIP codes used to collect a state through PetFinder's location search when
+the state abbreviation cannot be used (as for Nevada, see NV_POSTCODES in petfinder_collector.py).
+Each ZIP query returns animals within a radius of the ZIP, so hand-picked ZIP lists overlap heavily
+and spend API quota on animals another ZIP already returned.
+
+The planner reads ZIP centroids, treats every ZIP of the state as a point that must lie within the
+radius of at least one query, and computes a near-minimal set cover: a greedy pass that always picks
+the ZIP covering the most uncovered points, followed by a pruning pass that drops any chosen ZIP
+whose points are all covered by the others.
+
+ZIP Centroids:
+zip_centroids.csv, next to this script, holds the centroids of the active standard and PO box
+ZIPs of the states in STATE_ZIP_PREFIXES (taken from the MIT-licensed `zipcodes` package data)
+and is used by default. Other centroid tables can be passed with --centroids: the US Census
+Gazetteer ZCTA file (e.g. 2023_Gaz_zcta_national.txt from
+https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html) or any
+CSV with `zip`, `lat` and `lon` columns (and optionally `state`). The Gazetteer file has no state
+column, so states are selected by their 3-digit ZIP prefixes (STATE_ZIP_PREFIXES).
+
+Usage:
+    python zip_coverage_planner.py --state NV --radius 100 \
+        --progress cat/2025-08-11/progress_adopted.json
+
+    python zip_coverage_planner.py --centroids 2023_Gaz_zcta_national.txt --state NV
+
+Petfinder API Documentation: https://www.petfinder.com/developers/v2/docs/
+"""
+
+import argparse
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# PetFinder's default search radius in miles when no `distance` parameter is sent
+DEFAULT_RADIUS_MILES: float = 100
+PAGE_SIZE: int = 100  # animals per page requested by the collector
+EARTH_RADIUS_MILES: float = 3958.8
+# Bundled zip/state/lat/lon table covering the states in STATE_ZIP_PREFIXES
+DEFAULT_CENTROIDS_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zip_centroids.csv')
+
+# 3-digit ZIP prefixes of states collected through ZIP queries
+STATE_ZIP_PREFIXES: Dict[str, List[str]] = {
+    'NV': ['889', '890', '891', '893', '894', '895', '897', '898'],
+}
+
+
+def load_zip_centroids(path: str, state: Optional[str] = None,
+                       zip_prefixes: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load ZIP centroids from a Census Gazetteer ZCTA file or a zip/lat/lon CSV.
+
+    Args:
+        path (str): Gazetteer file (tab separated, GEOID/INTPTLAT/INTPTLONG columns) or CSV
+            with zip, lat and lon columns, optionally with a state column
+        state (Optional[str]): State abbreviation to keep
+        zip_prefixes (Optional[List[str]]): 3-digit ZIP prefixes to keep, defaults to the
+            state's STATE_ZIP_PREFIXES when the file has no state column
+
+    Returns:
+        pd.DataFrame: Columns zip (5-digit string), lat and lon
+
+    Raises:
+        ValueError: If the columns are not recognised or the state cannot be selected
+    """
+    sep = '\t' if path.endswith('.txt') else ','
+    df = pd.read_csv(path, sep=sep, dtype=str)
+    df.columns = [column.strip().lower() for column in df.columns]
+    df = df.rename(columns={'geoid': 'zip', 'intptlat': 'lat', 'intptlong': 'lon',
+                            'zcta': 'zip', 'zipcode': 'zip', 'latitude': 'lat',
+                            'longitude': 'lon', 'lng': 'lon'})
+
+    missing = {'zip', 'lat', 'lon'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Centroid file {path} is missing columns: {', '.join(sorted(missing))}")
+
+    df['zip'] = df['zip'].str.strip().str.zfill(5)
+    if state and 'state' in df.columns and zip_prefixes is None:
+        df = df[df['state'].str.strip().str.upper() == state.upper()]
+    elif state or zip_prefixes:
+        prefixes = zip_prefixes or STATE_ZIP_PREFIXES.get(state.upper())
+        if not prefixes:
+            raise ValueError(f"No state column in {path} and no ZIP prefixes known for {state}")
+        df = df[df['zip'].str[:3].isin(prefixes)]
+
+    df = df.assign(lat=df['lat'].astype(float), lon=df['lon'].astype(float))
+    return df[['zip', 'lat', 'lon']].drop_duplicates('zip').sort_values('zip').reset_index(drop=True)
+
+
+def haversine_miles(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in miles, broadcasting over the inputs."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def coverage_matrix(centroids: pd.DataFrame, radius_miles: float = DEFAULT_RADIUS_MILES) -> np.ndarray:
+    """
+    Boolean matrix where entry [i, j] says a query at ZIP i covers the centroid of ZIP j.
+
+    Args:
+        centroids (pd.DataFrame): Output of load_zip_centroids
+        radius_miles (float): Search radius of each query
+
+    Returns:
+        np.ndarray: Square boolean matrix in the row order of `centroids`
+    """
+    lat = centroids['lat'].to_numpy()
+    lon = centroids['lon'].to_numpy()
+    return haversine_miles(lat[:, None], lon[:, None], lat[None, :], lon[None, :]) <= radius_miles
+
+
+def plan_coverage(centroids: pd.DataFrame, radius_miles: float = DEFAULT_RADIUS_MILES) -> List[str]:
+    """
+    Choose a near-minimal set of ZIP queries whose radii cover every ZIP centroid.
+
+    Greedy set cover picks, at each step, the ZIP covering the most still-uncovered centroids
+    (ties go to the ZIP covering fewer centroids overall, i.e. with less overlap). A pruning
+    pass then removes chosen ZIPs that became redundant.
+
+    Args:
+        centroids (pd.DataFrame): Output of load_zip_centroids
+        radius_miles (float): Search radius of each query
+
+    Returns:
+        List[str]: Chosen ZIP codes, sorted
+    """
+    covers = coverage_matrix(centroids, radius_miles)
+    sizes = covers.sum(axis=1)
+    uncovered = np.ones(len(centroids), dtype=bool)
+    chosen: List[int] = []
+
+    while uncovered.any():
+        gains = covers[:, uncovered].sum(axis=1)
+        best = np.flatnonzero(gains == gains.max())
+        pick = best[np.argmin(sizes[best])]
+        chosen.append(pick)
+        uncovered &= ~covers[pick]
+
+    # Drop queries whose centroids are all covered by the other chosen queries
+    for pick in sorted(chosen, key=lambda i: sizes[i]):
+        others = [i for i in chosen if i != pick]
+        if others and covers[others].any(axis=0).all():
+            chosen = others
+
+    return sorted(centroids['zip'].iloc[chosen].tolist())
+
+
+def pages_from_progress(progress_file: str, page_size: int = PAGE_SIZE) -> Dict[str, int]:
+    """
+    Read how many pages each location needed from a collector progress file.
+
+    Uses the per-location fetched counts the collector records for its overlap report.
+
+    Args:
+        progress_file (str): progress_{status}.json written by petfinder_collector.py
+        page_size (int): Animals per page
+
+    Returns:
+        Dict[str, int]: Pages fetched per location
+    """
+    with open(progress_file, 'r') as f:
+        progress = json.load(f)
+    return {location: max(1, math.ceil(info['fetched'] / page_size))
+            for location, info in progress.get('overlap', {}).items()}
+
+
+def estimate_requests(zips: List[str], pages_per_zip: Dict[str, int]) -> int:
+    """
+    Estimate the requests needed to collect a list of ZIPs.
+
+    ZIPs without a known page count are assumed to need the average of the known ones
+    (one page if nothing is known).
+
+    Args:
+        zips (List[str]): ZIP codes to query
+        pages_per_zip (Dict[str, int]): Known pages per ZIP
+
+    Returns:
+        int: Estimated number of requests
+    """
+    default = round(np.mean(list(pages_per_zip.values()))) if pages_per_zip else 1
+    return sum(pages_per_zip.get(zip_code, default) for zip_code in zips)
+
+
+def main() -> None:
+    """
+    Plan the ZIP queries for a state and compare them with the current list.
+
+    Prints the planned ZIP list as a Python literal ready to paste into petfinder_collector.py,
+    the number of centroids left uncovered by the current list, and the estimated requests of
+    both lists.
+    """
+    parser = argparse.ArgumentParser(description="Plan a near-minimal set of ZIP radius queries covering a state.")
+    parser.add_argument('--centroids', default=DEFAULT_CENTROIDS_FILE,
+                        help="Census Gazetteer ZCTA file or zip/lat/lon CSV (default: bundled zip_centroids.csv)")
+    parser.add_argument('--state', default='NV', help="State to cover (default: NV)")
+    parser.add_argument('--radius', type=float, default=DEFAULT_RADIUS_MILES, help="Query radius in miles")
+    parser.add_argument('--current', help="Comma-separated ZIPs in use, defaults to NV_POSTCODES for NV")
+    parser.add_argument('--progress', help="Collector progress file, used to estimate pages per ZIP")
+    args = parser.parse_args()
+
+    centroids = load_zip_centroids(args.centroids, state=args.state)
+    if centroids.empty:
+        raise SystemExit(f"No ZIP centroids found for {args.state} in {args.centroids}")
+
+    planned = plan_coverage(centroids, args.radius)
+
+    if args.current:
+        current = [zip_code.strip() for zip_code in args.current.split(',')]
+    elif args.state.upper() == 'NV':
+        from petfinder_collector import NV_POSTCODES
+        current = NV_POSTCODES
+    else:
+        current = []
+
+    pages_per_zip = pages_from_progress(args.progress) if args.progress else {}
+
+    print(f"{args.state}: {len(centroids)} ZIP centroids, radius {args.radius:g} miles")
+    print(f"Planned {len(planned)} ZIP queries:")
+    print(json.dumps(planned))
+
+    if current:
+        known = centroids['zip'].isin(current).to_numpy()
+        covers = coverage_matrix(centroids, args.radius)
+        uncovered = int((~covers[known].any(axis=0)).sum()) if known.any() else len(centroids)
+        current_requests = estimate_requests(current, pages_per_zip)
+        planned_requests = estimate_requests(planned, pages_per_zip)
+        print(f"Current list: {len(current)} ZIP queries, {uncovered} centroids outside their radius")
+        print(f"Estimated requests per sweep: {current_requests} current vs {planned_requests} planned "
+              f"({current_requests - planned_requests} saved)")
+
+
+if __name__ == "__main__":
+    main()